@@ -0,0 +1,210 @@
+"""Benchmark the fetch -> chart -> indicator -> serialize path the dashboard runs.
+
+Usage:
+    python benchmarks/bench_pipeline.py                      # full sweep, 100 to 10M rows
+    python benchmarks/bench_pipeline.py --sizes 100,10000 --label before-change
+    python benchmarks/bench_pipeline.py --compare before-change
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plotly
+import plotly.io as pio
+
+from services import stock_data
+from services.providers import MarketDataProvider, random_walk_frame, set_provider
+from utils.charts import chart_arrays, create_line_chart, create_candlestick_chart, add_moving_averages
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+CHART_TYPES = ["Line Chart", "Candlestick Chart"]
+TICKER = "BENCH"
+# Relative slowdown in wall time or growth in memory/payload flagged as a regression
+REGRESSION_THRESHOLD = 0.20
+
+
+class FrameProvider(MarketDataProvider):
+    """Serves one prebuilt frame so the fetch stage measures only our own code"""
+
+    name = "benchmark"
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def history(self, ticker, period=None, start=None, interval="1d"):
+        return self.frame
+
+
+def run_pipeline(chart_type, show_ma):
+    """Run the dashboard's render path once and return per-stage timings and payload size"""
+    timings = {}
+
+    # Every run starts cold, so 'fetch' times the provider call, freeze and cache insert
+    stock_data.clear_history_cache()
+    start = time.perf_counter()
+    data = stock_data.get_stock_data(TICKER, "max")
+    timings['fetch'] = time.perf_counter() - start
+
+    # What the rest of a session's reruns pay; reported apart from the total
+    start = time.perf_counter()
+    stock_data.get_stock_data(TICKER, "max")
+    fetch_warm = time.perf_counter() - start
+
+    start = time.perf_counter()
+    arrays = chart_arrays(data)
+    if chart_type == "Line Chart":
+        fig = create_line_chart(data, TICKER, arrays=arrays)
+    else:
+        fig = create_candlestick_chart(data, TICKER, arrays=arrays)
+    timings['chart'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if show_ma:
+        fig = add_moving_averages(fig, data, TICKER, arrays=arrays)
+    timings['indicators'] = time.perf_counter() - start
+
+    # st.plotly_chart ships the figure to the browser as Plotly JSON
+    start = time.perf_counter()
+    payload = pio.to_json(fig, validate=False)
+    timings['serialize'] = time.perf_counter() - start
+
+    timings['total'] = sum(timings.values())
+    timings['fetch_warm'] = fetch_warm
+    return timings, len(payload.encode('utf-8'))
+
+
+def run_case(rows, chart_type, show_ma, repeat):
+    """Time a case repeat times, then measure its peak memory in a separate traced run"""
+    best = None
+    for _ in range(repeat):
+        timings, payload_bytes = run_pipeline(chart_type, show_ma)
+        if best is None or timings['total'] < best['total']:
+            best = timings
+
+    tracemalloc.start()
+    run_pipeline(chart_type, show_ma)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'rows': rows,
+        'chart_type': chart_type,
+        'show_ma': show_ma,
+        'wall_time': best,
+        'peak_memory_bytes': peak,
+        'figure_bytes': payload_bytes,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_results(label):
+    with open(os.path.join(RESULTS_DIR, f"{label}.json"), 'r') as f:
+        return json.load(f)
+
+
+def save_results(label, results):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{label}.json")
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Print per-case ratios against a baseline run and return the regressed cases"""
+    def case_key(case):
+        return (case['rows'], case['chart_type'], case['show_ma'])
+
+    baseline_cases = {case_key(case): case for case in baseline['cases']}
+    regressions = []
+    print(f"\nComparison against {baseline['label']} ({baseline['revision']}):")
+    for case in current['cases']:
+        old = baseline_cases.get(case_key(case))
+        if old is None:
+            continue
+        ratios = {
+            'time': case['wall_time']['total'] / max(old['wall_time']['total'], 1e-9),
+            'memory': case['peak_memory_bytes'] / max(old['peak_memory_bytes'], 1),
+            'payload': case['figure_bytes'] / max(old['figure_bytes'], 1),
+        }
+        flagged = [name for name, ratio in ratios.items() if ratio > 1 + threshold]
+        marker = "  REGRESSION: " + ", ".join(flagged) if flagged else ""
+        print(
+            f"  {case['rows']:>10,} {case['chart_type']:<18} MA={str(case['show_ma']):<5} "
+            f"time x{ratios['time']:.2f}  memory x{ratios['memory']:.2f}  "
+            f"payload x{ratios['payload']:.2f}{marker}"
+        )
+        if flagged:
+            regressions.append(case)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard chart pipeline")
+    parser.add_argument('--sizes', default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated row counts")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per case; the best is kept")
+    parser.add_argument('--label', help="name for the stored results (default: git revision)")
+    parser.add_argument('--compare', help="label of stored results to compare against")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    revision = git_revision()
+    label = args.label or revision
+
+    cases = []
+    for rows in sizes:
+        frame = random_walk_frame(rows, freq="min", seed=rows)
+        set_provider(FrameProvider(frame))
+        for chart_type in CHART_TYPES:
+            for show_ma in (False, True):
+                case = run_case(rows, chart_type, show_ma, args.repeat)
+                cases.append(case)
+                print(
+                    f"{rows:>10,} {chart_type:<18} MA={str(show_ma):<5} "
+                    f"{case['wall_time']['total'] * 1000:>10.1f} ms  "
+                    f"fetch cold {case['wall_time']['fetch'] * 1000:>8.2f} / warm {case['wall_time']['fetch_warm'] * 1000:.3f} ms  "
+                    f"peak {case['peak_memory_bytes'] / 1e6:>9.1f} MB  "
+                    f"figure {case['figure_bytes'] / 1e6:>9.2f} MB"
+                )
+        del frame
+
+    results = {
+        'label': label,
+        'revision': revision,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'plotly': plotly.__version__,
+        'cases': cases,
+    }
+    print(f"\nSaved results to {save_results(label, results)}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), results, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,67 @@
-import streamlit_authenticator as stauth
+import argparse
+import csv
+import sys
+import time
 
-# Create hasher instance (no arguments)
-hasher = stauth.Hasher()
+from utils.password_hashing import HASH_WORKERS, hash_passwords
 
-# Generate hashed passwords
-passwords = ['admin123', 'demo123']
-hashed_passwords = []
+CSV_COLUMNS = ('username', 'email', 'name', 'password')
 
-for password in passwords:
-    hashed_password = hasher.hash(password)
-    hashed_passwords.append(hashed_password)
 
-print("Hashed passwords:")
-for i, hashed in enumerate(hashed_passwords):
-    print(f"Password {i+1}: {hashed}")
+def read_users(path):
+    """Read users to provision from a CSV with username, email, name and password columns"""
+    with open(path, newline='') as file:
+        reader = csv.DictReader(file)
+        missing = set(CSV_COLUMNS) - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"{path} is missing columns: {', '.join(sorted(missing))}")
+        return [
+            {column: row[column].strip() for column in CSV_COLUMNS}
+            for row in reader
+            if row['username'] and row['password']
+        ]
+
+
+def provision(path, output=None):
+    """Hash every password in the CSV in parallel, then add the users or write them out"""
+    users = read_users(path)
+    start = time.perf_counter()
+    hashed = hash_passwords([user['password'] for user in users])
+    elapsed = time.perf_counter() - start
+    print(f"Hashed {len(users)} passwords in {elapsed:.1f}s with {HASH_WORKERS} workers")
+
+    for user, password_hash in zip(users, hashed):
+        user['password'] = password_hash
+
+    if output:
+        with open(output, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(users)
+        print(f"Wrote hashed users to {output}")
+    else:
+        from utils.user_store import add_users
+        added = add_users(users)
+        print(f"Added {added} users ({len(users) - added} skipped: username or email taken)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash passwords, or provision users in bulk from a CSV")
+    parser.add_argument('csv', nargs='?', help="CSV with username, email, name, password columns")
+    parser.add_argument('--output', help="Write hashed users to this CSV instead of adding them")
+    parser.add_argument('--password', action='append', default=[], help="Print the hash of a password")
+    args = parser.parse_args()
+
+    if args.csv:
+        provision(args.csv, args.output)
+        return
+
+    # Without a CSV, hash the given (or demo) passwords
+    passwords = args.password or ['admin123', 'demo123']
+    print("Hashed passwords:")
+    for i, hashed in enumerate(hash_passwords(passwords)):
+        print(f"Password {i+1}: {hashed}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
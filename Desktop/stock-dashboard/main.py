@@ -1,8 +1,16 @@
 import streamlit as st
-import streamlit_authenticator as stauth
-import yaml
-from yaml.loader import SafeLoader
-import os
+
+from utils import startup_profile
+
+startup_profile.page_start("main")
+
+from services.prefetch import start_prefetcher
+from utils.user_store import get_cookie_config, get_credentials
+
+startup_profile.imports_done("main")
+
+# Warm every user's favourites in the background (a no-op once the thread is running)
+start_prefetcher()
 
 # Page configuration
 st.set_page_config(
@@ -45,43 +53,17 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load configuration
-@st.cache_data
-def load_config():
-    if os.path.exists('config.yaml'):
-        with open('config.yaml') as file:
-            return yaml.load(file, Loader=SafeLoader)
-    else:
-        # Create default config
-        default_config = {
-            'credentials': {
-                'usernames': {
-                    'admin': {
-                        'email': 'admin@stockdashboard.com',
-                        'name': 'Administrator',
-                        'password': '$2b$12$3HbBuSN0/y2pRWQtN7ivKeBQdqQ.vG5RHfZ7z0ShIwAeIT7ik7p2i'  # admin123
-                    }
-                }
-            },
-            'cookie': {
-                'expiry_days': 30,
-                'key': 'stock_dashboard_auth_key',
-                'name': 'stock_dashboard_cookie'
-            }
-        }
-        with open('config.yaml', 'w') as file:
-            yaml.dump(default_config, file)
-        return default_config
-
-config = load_config()
-
-# Initialize authenticator
+# Initialize authenticator (users.db is created from config.yaml on first run)
 if 'authenticator' not in st.session_state:
-    st.session_state.authenticator = stauth.Authenticate(
-        config['credentials'],
-        config['cookie']['name'],
-        config['cookie']['key'],
-        config['cookie']['expiry_days']
+    # Only needed once per session, so later visits skip the import
+    from utils.authenticator import Authenticator
+
+    cookie_config = get_cookie_config()
+    st.session_state.authenticator = Authenticator(
+        get_credentials(),
+        cookie_config['name'],
+        cookie_config['key'],
+        cookie_config['expiry_days']
     )
 
 authenticator = st.session_state.authenticator
@@ -223,4 +205,6 @@ if not st.session_state.get("authentication_status"):
     - **Indian Stocks**: Search "Reliance" or use "RELIANCE.NS" 
     - **Multi-Currency**: Prices automatically display in correct currency (₹, $, etc.)
     - **Technical Analysis**: Enable moving averages for trend analysis
-    """)
\ No newline at end of file
+    """)
+
+startup_profile.page_rendered("main")
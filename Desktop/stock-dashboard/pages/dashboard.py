@@ -5,14 +5,26 @@ import os
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from services.stock_data import get_stock_data, get_stock_info, yahoo_search_stocks
-from utils.charts import create_line_chart, create_candlestick_chart, add_moving_averages
+from utils import startup_profile
+
+startup_profile.page_start("dashboard")
+
+from services.stock_data import get_live_indicators, get_watchlist_overview, start_stock_fetch, yahoo_search_stocks
+from utils.charts import MAX_CHART_POINTS, chart_arrays, create_line_chart, create_candlestick_chart, add_moving_averages, add_indicators, create_indicator_chart
+from utils.indicators import available_indicators, spec_label
 from utils.settings_manager import load_user_favourites, save_user_favourites
+from utils import tracing
+from utils.user_store import is_admin
+
+startup_profile.imports_done("dashboard")
+tracing.start_rerun("dashboard")
+tracing.stage("setup")
 
 username = st.session_state['username']
 
 if "favourite_stocks" not in st.session_state:
-    st.session_state.favourite_stocks = load_user_favourites(username)
+    with tracing.span("load favourites"):
+        st.session_state.favourite_stocks = load_user_favourites(username)
 
 # Page configuration
 st.set_page_config(
@@ -59,11 +71,28 @@ if "selected_stock_from_favourites" not in st.session_state:
 if 'dark_mode' not in st.session_state:
     st.session_state.dark_mode = False
 
+time_periods = {
+    '1 Week': '1wk',
+    '1 Month': '1mo',
+    '3 Months': '3mo',
+    '6 Months': '6mo',
+    '1 Year': '1y',
+    '2 Years': '2y'
+}
+
+bar_intervals = {
+    'Daily': '1d',
+    '1 Minute': '1m',
+    '5 Minutes': '5m',
+    '15 Minutes': '15m'
+}
+
 # Dashboard header
 st.title("Stock Visualization Dashboard")
 st.markdown(f"Welcome back, **{st.session_state['name']}**!")
 
 # Sidebar
+tracing.stage("sidebar")
 with st.sidebar:
     st.markdown(f"**Username:** {st.session_state['username']}")
     st.markdown("---")
@@ -80,7 +109,7 @@ with st.sidebar:
     
     # Handle search results
     if search_query and len(search_query) >= 2:
-        with st.spinner("Searching..."):
+        with st.spinner("Searching..."), tracing.span("search"):
             suggestions = yahoo_search_stocks(search_query)
     
         if suggestions:
@@ -161,24 +190,35 @@ with st.sidebar:
     if st.session_state.selected_stock_from_favourites:
         selected_stock = st.session_state.selected_stock_from_favourites
 
+    # Start quote and history fetches now so they overlap the rest of the sidebar
+    stock_fetch = None
+    if selected_stock:
+        expected_period = time_periods.get(st.session_state.get('selected_period'), '1mo')
+        expected_interval = bar_intervals.get(st.session_state.get('selected_interval'), '1d')
+        with tracing.span("start fetch", ticker=selected_stock):
+            stock_fetch = start_stock_fetch(selected_stock, expected_period, expected_interval)
+
     # Controls with default values (no user preferences)
     st.markdown("---")
-    time_periods = {
-        '1 Week': '1wk',
-        '1 Month': '1mo',
-        '3 Months': '3mo',
-        '6 Months': '6mo',
-        '1 Year': '1y',
-        '2 Years': '2y'
-    }
     
     # Use default values instead of user settings
     selected_period = st.selectbox(
         "Select Time Period", 
         list(time_periods.keys()),
-        index=1  # Default to 1 Month
+        index=1,  # Default to 1 Month
+        key="selected_period"
     )
     
+    selected_interval = st.selectbox(
+        "Bar Interval",
+        list(bar_intervals.keys()),
+        index=0,  # Default to daily bars
+        key="selected_interval"
+    )
+    interval = bar_intervals[selected_interval]
+    if interval != '1d':
+        st.caption("Intraday bars cover the most recent sessions; the time period applies to daily bars.")
+    
     # Use default chart type
     chart_options = ["Line Chart", "Candlestick Chart"]
     chart_type = st.radio(
@@ -193,6 +233,13 @@ with st.sidebar:
         value=False  # Default to False
     )
     
+    selected_indicators = st.multiselect(
+        "Technical Indicators",
+        available_indicators(),
+        format_func=spec_label,
+        key="selected_indicators"
+    )
+    
     # RESTORED Theme toggle
     st.markdown("---")
     st.markdown("### Theme Settings")
@@ -225,6 +272,9 @@ with st.sidebar:
     if st.button("Profile", use_container_width=True):
         st.switch_page("pages/profile.py")
     
+    if is_admin(username) and st.button("Metrics", use_container_width=True):
+        st.switch_page("pages/metrics.py")
+    
     if st.button("Logout", use_container_width=True):
         for key in list(st.session_state.keys()):
             del st.session_state[key]
@@ -232,11 +282,42 @@ with st.sidebar:
         st.session_state.manual_navigation = True
         st.switch_page("main.py")
 
+# Watchlist overview for all favourites, filled by one batched download
+tracing.stage("watchlist")
+if st.session_state.favourite_stocks:
+    with st.expander(f"Watchlist Overview ({len(st.session_state.favourite_stocks)} favourites)", expanded=not selected_stock):
+        with st.spinner("Loading watchlist..."), tracing.span("watchlist fetch"):
+            watchlist = get_watchlist_overview(st.session_state.favourite_stocks, time_periods[selected_period])
+        
+        if watchlist:
+            st.dataframe(
+                [
+                    {
+                        'Ticker': row['ticker'],
+                        'Last Price': f"{row['currency_symbol']}{row['last_price']:.2f}",
+                        'Change %': f"{row['change_percent']:+.2f}%",
+                        f'{selected_period} Change %': f"{row['period_change_percent']:+.2f}%",
+                        'Period Range': f"{row['currency_symbol']}{row['period_low']:.2f} - {row['currency_symbol']}{row['period_high']:.2f}"
+                    }
+                    for row in watchlist
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.info("Could not load watchlist data right now.")
+
 # Main content
+tracing.stage("main")
 if selected_stock:
+    # Restart the fetch only if the period changed after it was started
+    if stock_fetch is None or (stock_fetch.period, stock_fetch.interval) != (time_periods[selected_period], interval):
+        stock_fetch = start_stock_fetch(selected_stock, time_periods[selected_period], interval)
+    
+    with st.spinner(f"Loading data for {selected_stock}..."), tracing.span("quote and history fetch", ticker=selected_stock):
+        stock_info, stock_data = stock_fetch.result()
+    
     # Stock info display
-    with st.spinner(f"Loading data for {selected_stock}..."):
-        stock_info = get_stock_info(selected_stock)
     
     if stock_info:
         st.subheader(f"{stock_info['name']} ({selected_stock})")
@@ -277,22 +358,65 @@ if selected_stock:
                 st.info("No Change")
     
     # Chart display
-    with st.spinner("Loading chart data..."):
-        stock_data = get_stock_data(selected_stock, time_periods[selected_period])
-    
     if stock_data is not None and not stock_data.empty:
-        st.subheader(f"{selected_stock} - {selected_period} Chart")
+        chart_span = selected_period if interval == '1d' else f"{selected_interval} Intraday"
+        st.subheader(f"{selected_stock} - {chart_span} Chart")
         
-        if chart_type == "Line Chart":
-            fig = create_line_chart(stock_data, selected_stock)
-            if show_ma:
-                fig = add_moving_averages(fig, stock_data.copy(), selected_stock)
-        else:
-            fig = create_candlestick_chart(stock_data, selected_stock)
+        # Long series are downsampled for the browser; zooming re-renders the range at full resolution
+        chart_data = stock_data
+        first_day, last_day = stock_data.index[0].date(), stock_data.index[-1].date()
+        if len(stock_data) > MAX_CHART_POINTS and first_day < last_day:
+            zoom_start, zoom_end = st.slider(
+                "Zoom range",
+                min_value=first_day,
+                max_value=last_day,
+                value=(first_day, last_day),
+                key=f"zoom_{selected_stock}_{selected_period}_{interval}"
+            )
+            chart_data = stock_data.loc[str(zoom_start):str(zoom_end)]
+            if len(chart_data) > MAX_CHART_POINTS:
+                st.caption(f"Showing {MAX_CHART_POINTS:,} of {len(chart_data):,} points. Narrow the zoom range for full resolution.")
+        
+        # Indicators are computed over the whole period, memoized per ticker and period until new
+        # bars arrive, and cut to the zoom range for display
+        indicator_key = (selected_stock, time_periods[selected_period], interval)
+        
+        with tracing.span("figure build", rows=len(chart_data)):
+            # Read-only views of the chart range, shared by every trace below
+            arrays = chart_arrays(chart_data)
+            
+            if chart_type == "Line Chart":
+                fig = create_line_chart(chart_data, selected_stock, arrays=arrays)
+            else:
+                fig = create_candlestick_chart(chart_data, selected_stock, arrays=arrays)
             if show_ma:
-                fig = add_moving_averages(fig, stock_data.copy(), selected_stock)
+                fig = add_moving_averages(fig, chart_data, selected_stock, key=indicator_key, arrays=arrays,
+                                          history=stock_data)
+            
+            if selected_indicators:
+                fig = add_indicators(fig, chart_data, selected_stock, selected_indicators, key=indicator_key,
+                                     arrays=arrays, history=stock_data)
+        
+        with tracing.span("chart render"):
+            st.plotly_chart(fig, use_container_width=True)
         
-        st.plotly_chart(fig, use_container_width=True)
+        with tracing.span("indicator chart"):
+            indicator_fig = create_indicator_chart(chart_data, selected_stock, selected_indicators, key=indicator_key,
+                                                   arrays=arrays, history=stock_data)
+            if indicator_fig is not None:
+                st.plotly_chart(indicator_fig, use_container_width=True)
+        
+        # Latest values from the live series' streaming indicators
+        if interval != '1d' and selected_indicators:
+            live_values = get_live_indicators(selected_stock, interval, selected_indicators)
+            readings = [
+                f"**{name}:** {value:.2f}"
+                for values in live_values.values()
+                for name, value in values.items()
+                if value == value  # skip NaN during warm-up
+            ]
+            if readings:
+                st.caption("Live: " + " · ".join(readings))
         
         # Statistics
         col1, col2 = st.columns([1, 2])
@@ -311,19 +435,21 @@ if selected_stock:
             st.subheader("Recent Performance")
             recent_data = stock_data.tail(10)
             
-            st.dataframe(
-                recent_data[['Open', 'High', 'Low', 'Close', 'Volume']].round(2),
-                use_container_width=True,
-                height=400
-            )
+            with tracing.span("dataframe render"):
+                st.dataframe(
+                    recent_data[['Open', 'High', 'Low', 'Close', 'Volume']].round(2),
+                    use_container_width=True,
+                    height=400
+                )
         
         if st.checkbox("Show Complete Historical Data"):
             st.subheader("Complete Historical Data")
-            st.dataframe(
-                stock_data[['Open', 'High', 'Low', 'Close', 'Volume']].round(2),
-                use_container_width=True,
-                height=500
-            )
+            with tracing.span("full history render", rows=len(stock_data)):
+                st.dataframe(
+                    stock_data[['Open', 'High', 'Low', 'Close', 'Volume']].round(2),
+                    use_container_width=True,
+                    height=500
+                )
     else:
         st.error(f"Could not fetch data for {selected_stock}. Please check the ticker symbol.")
 
@@ -340,3 +466,7 @@ else:
     - **Flexible Time Periods**: From 1 week to 2 years
     - **Favourites**: Save frequently viewed stocks for quick access
     """)
+
+startup_profile.page_rendered("dashboard")
+tracing.end_rerun()
+tracing.render_panel()
@@ -0,0 +1,104 @@
+import streamlit as st
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import startup_profile
+
+startup_profile.page_start("metrics")
+
+import pandas as pd
+
+from services import metrics
+from services.stock_data import get_coalescing_stats
+from utils.user_store import is_admin
+
+startup_profile.imports_done("metrics")
+
+# Page configuration
+st.set_page_config(
+    page_title="Metrics - Stock Dashboard",
+    page_icon="📈",
+    layout="wide"
+)
+
+# Authentication and admin check
+if not st.session_state.get("authentication_status"):
+    st.error("Please log in to access this page")
+    if st.button("Go to Login"):
+        st.switch_page("main.py")
+    st.stop()
+
+if not is_admin(st.session_state.get('username')):
+    st.error("Only administrators can view metrics")
+    if st.button("Back to Dashboard"):
+        st.switch_page("pages/dashboard.py")
+    st.stop()
+
+st.title("Metrics")
+st.caption(f"Since this server process started (pid {os.getpid()}). Latency percentiles are estimated from histogram buckets.")
+
+col1, col2 = st.columns([1, 5])
+with col1:
+    if st.button("Refresh", use_container_width=True):
+        st.rerun()
+with col2:
+    st.download_button(
+        "Download Prometheus metrics",
+        metrics.render_prometheus(),
+        file_name="stock_dashboard.prom",
+        mime="text/plain"
+    )
+
+# Calls made by the pages, and the provider requests behind them
+st.subheader("Calls by endpoint and exchange")
+rows = metrics.summary()
+if rows:
+    table = pd.DataFrame(rows).rename(columns={
+        'endpoint': 'Endpoint',
+        'exchange': 'Exchange',
+        'calls': 'Calls',
+        'call_p50_ms': 'p50 ms',
+        'call_p95_ms': 'p95 ms',
+        'call_mean_ms': 'Mean ms',
+        'hit_ratio': 'Cache Hit Ratio',
+        'errors': 'Errors',
+        'rows': 'Rows',
+        'upstream': 'Upstream Requests',
+        'upstream_p95_ms': 'Upstream p95 ms',
+        'upstream_errors': 'Upstream Errors',
+        'bytes': 'Bytes Received',
+    })
+    columns = ['Endpoint', 'Exchange', 'Calls', 'p50 ms', 'p95 ms', 'Mean ms', 'Cache Hit Ratio', 'Errors',
+               'Rows', 'Upstream Requests', 'Upstream p95 ms', 'Upstream Errors', 'Bytes Received']
+    st.dataframe(table.reindex(columns=columns).round(2), use_container_width=True, hide_index=True)
+else:
+    st.info("No calls recorded yet.")
+
+st.subheader("Errors")
+error_rows = metrics.errors()
+if error_rows:
+    st.dataframe(pd.DataFrame(error_rows), use_container_width=True, hide_index=True)
+else:
+    st.success("No errors recorded.")
+
+st.subheader("Caches")
+cache_rows = {}
+for name, labels, value in metrics.collect_samples():
+    cache = dict(labels)['cache']
+    cache_rows.setdefault(cache, {'Cache': cache})[name.replace('stock_dashboard_cache_', '')] = value
+if cache_rows:
+    caches = pd.DataFrame(list(cache_rows.values()))
+    lookups = caches['hits_total'] + caches['misses_total']
+    caches['hit_ratio'] = (caches['hits_total'] / lookups.where(lookups > 0)).round(3)
+    st.dataframe(caches, use_container_width=True, hide_index=True)
+
+coalescing = get_coalescing_stats()
+st.caption(", ".join(f"{key.replace('_', ' ')}: {value}" for key, value in coalescing.items()))
+
+with st.expander("Prometheus text"):
+    st.code(metrics.render_prometheus(), language="text")
+
+startup_profile.page_rendered("metrics")
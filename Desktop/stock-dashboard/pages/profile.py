@@ -1,11 +1,16 @@
 import streamlit as st
-import streamlit_authenticator as stauth
-import yaml
-from yaml.loader import SafeLoader
-import bcrypt
-import os
 import re
-import shutil
+
+from utils import startup_profile
+
+startup_profile.page_start("profile")
+
+from utils.password_hashing import hash_password, verify_password
+from utils.profile_images import DISPLAY_SIZE, InvalidImageError, get_thumbnail, save_profile_picture, upgrade_legacy_picture
+from utils.settings_manager import load_user_settings
+from utils.user_store import get_user, update_user
+
+startup_profile.imports_done("profile")
 
 # Page configuration
 st.set_page_config(
@@ -90,15 +95,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load and save config functions
-def load_config():
-    with open('config.yaml') as file:
-        return yaml.load(file, Loader=SafeLoader)
-
-def save_config(config):
-    with open('config.yaml', 'w') as file:
-        yaml.dump(config, file)
-
 # Password validation function
 def validate_password(password):
     if len(password) < 6:
@@ -109,15 +105,6 @@ def validate_password(password):
         return False, "Password must contain at least one number"
     return True, "Password is valid"
 
-PROFILE_PIC_DIR = "profile_pics"
-
-def get_profile_pic_path(username):
-    return os.path.join(PROFILE_PIC_DIR, f"{username}.png")
-
-def ensure_profile_pic_dir():
-    if not os.path.exists(PROFILE_PIC_DIR):
-        os.makedirs(PROFILE_PIC_DIR)
-
 st.title("👤 User Profile")
 st.markdown(f"Welcome, **{st.session_state['name']}**!")
 
@@ -138,12 +125,13 @@ with st.sidebar:
 
 # Initialize profile settings in session state 
 if 'profile_settings' not in st.session_state:
-    st.session_state.profile_settings = {
-        'theme_preference': 'Light',
-        'default_period': '1 Month',
-        'default_chart': 'Line Chart',
-        'show_ma_default': False
-    }
+    st.session_state.profile_settings = load_user_settings(st.session_state['username'])
+
+# Current user's record, looked up once per render
+user_data = get_user(st.session_state['username'])
+if user_data is None:
+    st.error("Account not found. Please log in again.")
+    st.stop()
 
 # Main content container
 st.markdown('<div class="profile-container">', unsafe_allow_html=True)
@@ -158,34 +146,39 @@ with tab1:
     col1, col2 = st.columns([1, 2])
 
     with col1:
-        ensure_profile_pic_dir()
-        config = load_config()
-        user_data = config['credentials']['usernames'][st.session_state['username']]
         profile_pic_path = user_data.get('profile_pic', None)
-        if profile_pic_path and os.path.exists(profile_pic_path):
-            st.image(profile_pic_path, width=150)
+        # Pictures uploaded before thumbnails existed are converted once
+        upgraded_path = upgrade_legacy_picture(st.session_state['username'], profile_pic_path)
+        if upgraded_path:
+            update_user(st.session_state['username'], profile_pic=upgraded_path)
+            profile_pic_path = upgraded_path
+        thumbnail_path = get_thumbnail(profile_pic_path, size=DISPLAY_SIZE)
+        if thumbnail_path:
+            st.image(thumbnail_path, width=DISPLAY_SIZE)
         else:
             st.image("https://via.placeholder.com/150x150.png?text=👤", width=150)
         st.caption("Profile Picture")
 
-        uploaded_pic = st.file_uploader("Upload New Profile Picture", type=["png", "jpg", "jpeg"], key="profile_pic_upload")
+        uploaded_pic = st.file_uploader("Upload New Profile Picture", type=["png", "jpg", "jpeg", "webp"], key="profile_pic_upload")
         if uploaded_pic is not None:
-            # Save uploaded image
-            ext = uploaded_pic.name.split('.')[-1]
-            save_path = os.path.join(PROFILE_PIC_DIR, f"{st.session_state['username']}.{ext}")
-            with open(save_path, "wb") as f:
-                f.write(uploaded_pic.getbuffer())
-            # Update config with new path
-            config['credentials']['usernames'][st.session_state['username']]['profile_pic'] = save_path
-            save_config(config)
-            st.success("Profile picture updated!")
-            st.rerun()
+            # The uploader keeps the file across reruns; only a new upload is decoded and saved
+            processed_id, upload_error = st.session_state.get('_profile_pic_processed', (None, None))
+            if uploaded_pic.file_id != processed_id:
+                upload_error = None
+                try:
+                    # Validate, strip metadata and write the fixed-size thumbnails
+                    save_path = save_profile_picture(st.session_state['username'], uploaded_pic.getvalue())
+                except InvalidImageError as e:
+                    upload_error = str(e)
+                st.session_state['_profile_pic_processed'] = (uploaded_pic.file_id, upload_error)
+                if upload_error is None and save_path != profile_pic_path:
+                    update_user(st.session_state['username'], profile_pic=save_path)
+                    st.success("Profile picture updated!")
+                    st.rerun()
+            if upload_error is not None:
+                st.error(f"❌ {upload_error}")
 
     with col2:
-        # Load current user info
-        config = load_config()
-        user_data = config['credentials']['usernames'][st.session_state['username']]
-        
         # Use Streamlit components instead of HTML for better theme compatibility
         st.markdown("#### Account Details")
         
@@ -243,22 +236,17 @@ with tab2:
                         st.error(f"❌ {error}")
                 else:
                     try:
-                        # Load config
-                        config = load_config()
                         username = st.session_state['username']
-                        user_data = config['credentials']['usernames'][username]
+                        user_data = get_user(username)
                         
-                        # Verify current password using bcrypt
+                        # Verify current password using bcrypt in the worker pool
                         stored_hash = user_data['password']
-                        if bcrypt.checkpw(current_password.encode('utf-8'), stored_hash.encode('utf-8')):
+                        if verify_password(current_password, stored_hash):
                             # Hash new password
-                            new_hashed = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                            
-                            # Update config
-                            config['credentials']['usernames'][username]['password'] = new_hashed
+                            new_hashed = hash_password(new_password)
                             
-                            # Save config
-                            save_config(config)
+                            # Update just this user's row
+                            update_user(username, password=new_hashed)
                             
                             st.success("Password updated successfully!")
                             st.balloons()
@@ -278,3 +266,5 @@ with tab2:
         - Use a mix of uppercase and lowercase letters
         - Avoid common passwords
         """)
+
+startup_profile.page_rendered("profile")
@@ -1,9 +1,14 @@
 import streamlit as st
-import streamlit_authenticator as stauth
-import yaml
-from yaml.loader import SafeLoader
 import re
-import os
+
+from utils import startup_profile
+
+startup_profile.page_start("register")
+
+from utils.password_hashing import hash_password
+from utils.user_store import add_user, email_exists, username_exists
+
+startup_profile.imports_done("register")
 
 # Page configuration
 st.set_page_config(
@@ -54,24 +59,15 @@ def validate_password(password):
         return False, "Password must contain at least one number"
     return True, "Password is valid"
 
-def validate_username(username, existing_users):
+def validate_username(username):
     if len(username) < 3:
         return False, "Username must be at least 3 characters long"
-    if username in existing_users:
+    if username_exists(username):
         return False, "Username already exists"
     if not re.match(r'^[a-zA-Z0-9_]+$', username):
         return False, "Username can only contain letters, numbers, and underscores"
     return True, "Username is valid"
 
-# Load and save config
-def load_config():
-    with open('config.yaml') as file:
-        return yaml.load(file, Loader=SafeLoader)
-
-def save_config(config):
-    with open('config.yaml', 'w') as file:
-        yaml.dump(config, file)
-
 # Main header
 st.markdown('<h1 class="register-header">📝 Create Account</h1>', unsafe_allow_html=True)
 
@@ -107,9 +103,6 @@ with col2:
             submitted = st.form_submit_button("Create Account", type="primary", use_container_width=True)
             
             if submitted:
-                config = load_config()
-                existing_users = config.get('credentials', {}).get('usernames', {})
-                
                 # Validation
                 errors = []
                 
@@ -119,7 +112,7 @@ with col2:
                 if not username.strip():
                     errors.append("Username is required")
                 else:
-                    valid_username, username_msg = validate_username(username.lower(), existing_users)
+                    valid_username, username_msg = validate_username(username.lower())
                     if not valid_username:
                         errors.append(username_msg)
                 
@@ -142,40 +135,30 @@ with col2:
                     errors.append("You must agree to the Terms and Conditions")
                 
                 # Check if email already exists
-                for user_data in existing_users.values():
-                    if user_data.get('email', '').lower() == email.lower():
-                        errors.append("Email address already registered")
-                        break
+                if email.strip() and email_exists(email):
+                    errors.append("Email address already registered")
                 
                 if errors:
                     for error in errors:
                         st.error(f"❌ {error}")
                 else:
                     try:
-                        # Hash password
-                        hasher = stauth.Hasher([password])
-                        hashed_passwords = hasher.generate()
-                        hashed_password = hashed_passwords[0]
-                        
-                        # Add new user to config
-                        config['credentials']['usernames'][username.lower()] = {
-                            'email': email.lower(),
-                            'name': full_name.strip(),
-                            'password': hashed_password
-                        }
-                        
-                        # Save updated config
-                        save_config(config)
+                        # Hash password in the worker pool
+                        hashed_password = hash_password(password)
                         
-                        # Store user data and mark success
-                        st.session_state.new_user_data = {
-                            'name': full_name.strip(),
-                            'username': username.lower(),
-                            'email': email.lower()
-                        }
-                        st.session_state.registration_success = True
-                        
-                        st.rerun()
+                        # Add new user; the unique indexes catch a concurrent duplicate
+                        if add_user(username.lower(), email.lower(), full_name.strip(), hashed_password):
+                            # Store user data and mark success
+                            st.session_state.new_user_data = {
+                                'name': full_name.strip(),
+                                'username': username.lower(),
+                                'email': email.lower()
+                            }
+                            st.session_state.registration_success = True
+                            
+                            st.rerun()
+                        else:
+                            st.error("❌ Username or email address already registered")
                         
                     except Exception as e:
                         st.error(f"❌ Error creating account: {str(e)}")
@@ -231,3 +214,5 @@ if not st.session_state.get('registration_success', False):
     - Must contain at least one number
     - Use a mix of uppercase and lowercase letters for better security
     """)
+
+startup_profile.page_rendered("register")
@@ -0,0 +1,288 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+def estimate_size(value: Any) -> int:
+    """Roughly estimate the memory held by a value and its contents"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class TTLCache:
+    """Thread-safe in-process cache with per-entry expiry, LRU eviction and a memory cap"""
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 256,
+                 max_bytes: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = estimate_size):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a live entry, refreshing its LRU position"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store an entry, evicting least recently used entries past the caps"""
+        size = self.sizeof(value)
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Larger than the whole budget - never cacheable
+                return
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+
+    def stats(self) -> dict:
+        """Get hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+
+def frame_size(frame) -> int:
+    """Get the bytes held by a DataFrame's columns and index"""
+    return int(frame.memory_usage(index=True, deep=False).sum())
+
+
+def freeze_frame(frame):
+    """Get a read-only view of a DataFrame so sessions can share it without copying"""
+    # The view's columns are read-only views of the same arrays, leaving the caller's frame writable.
+    # Writes such as view.loc[...] = x raise instead of changing every session's data
+    import numpy as np
+    import pandas as pd
+
+    columns = {}
+    for column in frame.columns:
+        series = frame[column]
+        if isinstance(series.dtype, np.dtype):
+            values = series.to_numpy().view()
+            values.flags.writeable = False
+            columns[column] = values
+        else:
+            columns[column] = series.array  # extension arrays (e.g. tz-aware dates) are shared as they are
+    return pd.DataFrame(columns, index=frame.index, columns=frame.columns, copy=False)
+
+
+class _SharedEntry:
+    __slots__ = ('value', 'loaded_at', 'size')
+
+    def __init__(self, value, loaded_at, size):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.size = size
+
+
+class SharedCache:
+    """Process-wide cache shared by every session, refreshed in the background before entries expire.
+
+    A request blocks only on a miss. Once an entry is refresh_ahead * ttl old the
+    next lookup starts a background reload and is answered from the cached value;
+    stale values keep being served until max_stale seconds past the TTL.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_bytes: int = 256 * 1024 * 1024,
+                 refresh_ahead: float = 0.8, max_stale: float = 3600.0,
+                 max_entry_fraction: float = 0.25,
+                 sizeof: Callable[[Any], int] = estimate_size,
+                 refresh_context: Optional[Callable[[], Any]] = None,
+                 refresh_workers: int = 2):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.refresh_ahead = refresh_ahead
+        self.max_stale = max_stale
+        # One huge value may not push out everything else
+        self.max_entry_bytes = int(max_bytes * max_entry_fraction)
+        self.sizeof = sizeof
+        self.refresh_context = refresh_context
+        self.refresh_workers = refresh_workers
+        self._entries = OrderedDict()  # key -> _SharedEntry, least recently used first
+        self._bytes = 0
+        self._refreshing = set()
+        self._executor = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._refreshes = 0
+        self._refresh_errors = 0
+        self._evictions = 0
+        self._rejected = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[..., Any], *args) -> Any:
+        """Get a cached value, calling loader(*args) only on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.loaded_at
+                if age < self.ttl + self.max_stale:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    if age >= self.ttl:
+                        self._stale_hits += 1
+                    if age >= self.ttl * self.refresh_ahead:
+                        self._start_refresh(key, loader, args)
+                    return entry.value
+                self._remove(key)
+            self._misses += 1
+
+        value = loader(*args)
+        self.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting least recently used entries past the memory budget"""
+        if value is None:
+            return
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_entry_bytes:
+                self._rejected += 1
+                return
+            self._entries[key] = _SharedEntry(value, time.monotonic(), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _start_refresh(self, key, loader, args):
+        # Called with the lock held
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.refresh_workers, thread_name_prefix="cache-refresh"
+            )
+        self._executor.submit(self._refresh, key, loader, args)
+
+    def _refresh(self, key, loader, args):
+        try:
+            if self.refresh_context is not None:
+                with self.refresh_context():
+                    value = loader(*args)
+            else:
+                value = loader(*args)
+            self.put(key, value)
+            with self._lock:
+                self._refreshes += 1
+        except Exception as e:
+            # Keep serving the cached value; the next lookup tries again
+            print(f"Error refreshing cached {key}: {e}")
+            with self._lock:
+                self._refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, key: Hashable):
+        """Drop one entry so the next lookup loads it again"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        self._bytes -= self._entries.pop(key).size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Get hit/miss/refresh/eviction counters and current memory use"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else 0.0,
+                'stale_hits': self._stale_hits,
+                'refreshes': self._refreshes,
+                'refresh_errors': self._refresh_errors,
+                'refreshing': len(self._refreshing),
+                'evictions': self._evictions,
+                'rejected': self._rejected,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,75 @@
+import threading
+from typing import Any, Callable, Hashable
+
+from services.cache import TTLCache
+
+# Seconds a failed call is remembered so callers don't hammer a failing upstream
+NEGATIVE_CACHE_TTL = 15
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers asking for the same key"""
+
+    def __init__(self, error_ttl: float = NEGATIVE_CACHE_TTL):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._errors = TTLCache(ttl=error_ttl, max_entries=1024)
+        self._coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn once per key at a time; followers receive the leader's result or error"""
+        if key in self._errors:
+            error = self._errors.get(key)
+            if error is not None:
+                raise error
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            self._errors.set(key, e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def forget(self, key: Hashable):
+        """Drop a remembered failure so the next call goes upstream again"""
+        self._errors.pop(key)
+
+    def stats(self) -> dict:
+        """Get in-flight, coalesced and negative-cache counters"""
+        with self._lock:
+            in_flight = len(self._calls)
+            coalesced = self._coalesced
+        return {
+            'in_flight': in_flight,
+            'coalesced': coalesced,
+            'negative_entries': len(self._errors),
+        }
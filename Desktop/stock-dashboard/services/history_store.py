@@ -0,0 +1,367 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+STORE_DIR = "market_data"
+META_FILE = "meta.json"
+SEGMENT_PREFIX = "seg-"
+COMPRESSION = "zstd"
+
+# Seconds a stored series is treated as fresh before the tail is re-fetched
+STORE_REFRESH_SECONDS = 300
+# Segments per ticker before an append triggers an automatic compaction
+MAX_SEGMENTS = 16
+# Lock-free reads tried before a read waits for the ticker's writers
+READ_ATTEMPTS = 3
+
+# Columns whose non-zero values mark a dividend or split on that bar
+ACTION_COLUMNS = ('Dividends', 'Stock Splits')
+
+# Calendar days covered by each yfinance period string the store understands
+PERIOD_DAYS = {
+    '5d': 5,
+    '1wk': 7,
+    '1mo': 31,
+    '3mo': 92,
+    '6mo': 183,
+    '1y': 366,
+    '2y': 731,
+    '5y': 1827,
+}
+
+_ticker_locks: Dict[str, threading.RLock] = {}
+_locks_guard = threading.Lock()
+
+
+def _get_ticker_lock(ticker: str) -> threading.RLock:
+    """Get the in-process lock guarding writes for a ticker"""
+    # Re-entrant, since maintenance reads a ticker's bars while holding its lock.
+    # Keyed by directory name, so "reliance.ns", "RELIANCE.NS" and compact()'s names share one lock
+    name = os.path.basename(get_ticker_dir(ticker))
+    with _locks_guard:
+        if name not in _ticker_locks:
+            _ticker_locks[name] = threading.RLock()
+        return _ticker_locks[name]
+
+
+def get_ticker_dir(ticker: str) -> str:
+    """Get the directory holding a ticker's segments"""
+    safe_name = re.sub(r'[^A-Za-z0-9._^=-]', '_', ticker.upper())
+    return os.path.join(STORE_DIR, safe_name)
+
+
+def list_tickers() -> List[str]:
+    """List ticker directories present in the store"""
+    if not os.path.exists(STORE_DIR):
+        return []
+    return sorted(
+        name for name in os.listdir(STORE_DIR)
+        if os.path.isdir(os.path.join(STORE_DIR, name))
+    )
+
+
+def _list_segments(ticker_dir: str) -> List[str]:
+    if not os.path.exists(ticker_dir):
+        return []
+    return sorted(
+        os.path.join(ticker_dir, name) for name in os.listdir(ticker_dir)
+        if name.startswith(SEGMENT_PREFIX) and name.endswith('.parquet')
+    )
+
+
+def period_start(period: str) -> Optional[str]:
+    """Get the first calendar date (YYYY-MM-DD) a period covers, or None if unsupported"""
+    days = PERIOD_DAYS.get(period)
+    if days is None:
+        return None
+    start = datetime.now(timezone.utc).date() - timedelta(days=days)
+    return start.isoformat()
+
+
+def load_meta(ticker: str) -> dict:
+    """Load a ticker's store metadata"""
+    meta_path = os.path.join(get_ticker_dir(ticker), META_FILE)
+    if os.path.exists(meta_path):
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return {}
+    return {}
+
+
+def save_meta(ticker: str, meta: dict):
+    """Atomically write a ticker's store metadata"""
+    ticker_dir = get_ticker_dir(ticker)
+    os.makedirs(ticker_dir, exist_ok=True)
+    meta_path = os.path.join(ticker_dir, META_FILE)
+    tmp_path = f"{meta_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def is_stale(meta: dict, max_age: float = STORE_REFRESH_SECONDS) -> bool:
+    """Check whether the stored tail is old enough to be topped up"""
+    return time.time() - meta.get('fetched_at', 0) > max_age
+
+
+def _merge_frames(frames: List[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return None
+    merged = pd.concat(frames)
+    # Later segments hold the freshest copy of a re-fetched bar
+    merged = merged[~merged.index.duplicated(keep='last')]
+    return merged.sort_index()
+
+
+def _read_segments(ticker_dir: str) -> List[pd.DataFrame]:
+    """Read every segment, or raise FileNotFoundError if one disappears mid-read"""
+    return [pd.read_parquet(segment) for segment in _list_segments(ticker_dir)]
+
+
+def read_history(ticker: str, start: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Read a ticker's stored bars, optionally from a start date onwards"""
+    ticker_dir = get_ticker_dir(ticker)
+    frames = None
+    for _ in range(READ_ATTEMPTS):
+        try:
+            frames = _read_segments(ticker_dir)
+            break
+        except FileNotFoundError:
+            # A compaction or rewrite replaced the segments; skipping one would drop its bars
+            continue
+    if frames is None:
+        with _get_ticker_lock(ticker):
+            frames = _read_segments(ticker_dir)
+    data = _merge_frames(frames)
+    if data is None or start is None:
+        return data
+
+    start_ts = pd.Timestamp(start)
+    if data.index.tz is not None:
+        start_ts = start_ts.tz_localize(data.index.tz)
+    return data[data.index >= start_ts]
+
+
+def _write_segment(ticker_dir: str, frame: pd.DataFrame) -> str:
+    os.makedirs(ticker_dir, exist_ok=True)
+    name = f"{SEGMENT_PREFIX}{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+    segment_path = os.path.join(ticker_dir, name)
+    tmp_path = f"{segment_path}.tmp"
+    frame.to_parquet(tmp_path, compression=COMPRESSION)
+    os.replace(tmp_path, segment_path)
+    return segment_path
+
+
+def append_history(ticker: str, frame: pd.DataFrame, covered_from: Optional[str] = None):
+    """Append freshly fetched bars to a ticker's store and update its metadata"""
+    if frame is None or frame.empty:
+        return
+
+    ticker_dir = get_ticker_dir(ticker)
+    with _get_ticker_lock(ticker):
+        _write_segment(ticker_dir, frame)
+
+        meta = load_meta(ticker)
+        meta['ticker'] = ticker
+        meta['fetched_at'] = time.time()
+        meta['last_bar'] = frame.index.max().isoformat()
+        if covered_from and (not meta.get('covered_from') or covered_from < meta['covered_from']):
+            meta['covered_from'] = covered_from
+        save_meta(ticker, meta)
+
+        if len(_list_segments(ticker_dir)) > MAX_SEGMENTS:
+            _compact_locked(ticker)
+
+
+def replace_history(ticker: str, frame: pd.DataFrame, covered_from: Optional[str] = None):
+    """Replace every stored bar of a ticker, e.g. after a split or dividend re-adjusted its prices"""
+    if frame is None or frame.empty:
+        return
+
+    ticker_dir = get_ticker_dir(ticker)
+    with _get_ticker_lock(ticker):
+        old_segments = _list_segments(ticker_dir)
+        _write_segment(ticker_dir, frame)
+        for segment in old_segments:
+            os.remove(segment)
+
+        meta = load_meta(ticker)
+        meta['ticker'] = ticker
+        meta['fetched_at'] = time.time()
+        meta['last_bar'] = frame.index.max().isoformat()
+        meta['adjusted_at'] = time.time()
+        if covered_from:
+            meta['covered_from'] = covered_from
+        save_meta(ticker, meta)
+
+
+def has_new_corporate_actions(ticker: str, frame: pd.DataFrame) -> bool:
+    """Check whether fetched bars carry a dividend or split the stored bars have not seen.
+
+    Yahoo's prices are adjusted, so such an action changes every earlier bar too.
+    """
+    if frame is None or frame.empty:
+        return False
+    action_columns = [column for column in ACTION_COLUMNS if column in frame.columns]
+    if not action_columns:
+        return False
+    actions = frame[action_columns].fillna(0)
+    actions = actions[(actions != 0).any(axis=1)]
+    if actions.empty:
+        return False
+
+    stored = read_history(ticker)
+    if stored is None:
+        return False
+    stored_columns = [column for column in action_columns if column in stored.columns]
+    for timestamp, row in actions.iterrows():
+        if timestamp not in stored.index or not stored_columns:
+            return True
+        known = stored.loc[timestamp, stored_columns].fillna(0)
+        if (known != row[stored_columns]).any():
+            return True
+    return False
+
+
+def touch_history(ticker: str):
+    """Mark a ticker as freshly checked when the top-up returned no new bars"""
+    with _get_ticker_lock(ticker):
+        meta = load_meta(ticker)
+        if meta:
+            meta['fetched_at'] = time.time()
+            save_meta(ticker, meta)
+
+
+def _compact_locked(ticker: str) -> int:
+    ticker_dir = get_ticker_dir(ticker)
+    segments = _list_segments(ticker_dir)
+    if len(segments) <= 1:
+        return len(segments)
+
+    data = _merge_frames([pd.read_parquet(segment) for segment in segments])
+    if data is not None:
+        _write_segment(ticker_dir, data)
+    for segment in segments:
+        os.remove(segment)
+    return len(segments)
+
+
+def compact(ticker: Optional[str] = None) -> Dict[str, int]:
+    """Merge each ticker's segments into a single sorted, de-duplicated segment"""
+    tickers = [ticker] if ticker else list_tickers()
+    results = {}
+    for name in tickers:
+        with _get_ticker_lock(name):
+            results[name] = _compact_locked(name)
+    return results
+
+
+def verify(ticker: Optional[str] = None) -> Dict[str, List[str]]:
+    """Check every segment is readable and every series is well formed"""
+    tickers = [ticker] if ticker else list_tickers()
+    problems = {}
+    for name in tickers:
+        issues = []
+        frames = []
+        for segment in _list_segments(get_ticker_dir(name)):
+            try:
+                frames.append(pd.read_parquet(segment))
+            except Exception as e:
+                issues.append(f"unreadable segment {os.path.basename(segment)}: {e}")
+
+        data = _merge_frames(frames)
+        if data is None:
+            issues.append("no bars stored")
+        else:
+            missing = {'Open', 'High', 'Low', 'Close', 'Volume'} - set(data.columns)
+            if missing:
+                issues.append(f"missing columns: {', '.join(sorted(missing))}")
+            elif data['Close'].isna().any():
+                issues.append(f"{int(data['Close'].isna().sum())} bars with no close")
+
+        if not load_meta(name):
+            issues.append("missing or unreadable metadata")
+        if issues:
+            problems[name] = issues
+    return problems
+
+
+def prune(keep_days: Optional[int] = None, unused_days: Optional[int] = None) -> Dict[str, str]:
+    """Drop bars older than keep_days and tickers not refreshed for unused_days"""
+    results = {}
+    now = time.time()
+    for name in list_tickers():
+        ticker_dir = get_ticker_dir(name)
+        meta = load_meta(name)
+
+        if unused_days is not None:
+            with _get_ticker_lock(name):
+                # Re-read under the lock, in case an append refreshed the ticker meanwhile
+                meta = load_meta(name)
+                if now - meta.get('fetched_at', 0) > unused_days * 86400:
+                    for entry in os.listdir(ticker_dir):
+                        os.remove(os.path.join(ticker_dir, entry))
+                    os.rmdir(ticker_dir)
+                    results[name] = "removed"
+                    continue
+
+        if keep_days is not None:
+            cutoff = (datetime.now(timezone.utc).date() - timedelta(days=keep_days)).isoformat()
+            with _get_ticker_lock(name):
+                data = read_history(name, start=cutoff)
+                segments = _list_segments(ticker_dir)
+                if data is not None:
+                    _write_segment(ticker_dir, data)
+                for segment in segments:
+                    os.remove(segment)
+                if meta.get('covered_from', '') < cutoff:
+                    meta['covered_from'] = cutoff
+                    save_meta(name, meta)
+            results[name] = f"kept {0 if data is None else len(data)} bars"
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the local OHLCV history store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compact_parser = subparsers.add_parser('compact', help="merge segments per ticker")
+    compact_parser.add_argument('--ticker')
+
+    verify_parser = subparsers.add_parser('verify', help="check segments and metadata")
+    verify_parser.add_argument('--ticker')
+
+    prune_parser = subparsers.add_parser('prune', help="drop old bars and unused tickers")
+    prune_parser.add_argument('--keep-days', type=int)
+    prune_parser.add_argument('--unused-days', type=int)
+
+    args = parser.parse_args()
+
+    if args.command == 'compact':
+        for name, merged in compact(args.ticker).items():
+            print(f"{name}: merged {merged} segment(s)")
+    elif args.command == 'verify':
+        problems = verify(args.ticker)
+        for name, issues in problems.items():
+            for issue in issues:
+                print(f"{name}: {issue}")
+        print("Store OK" if not problems else f"{len(problems)} ticker(s) with problems")
+        raise SystemExit(1 if problems else 0)
+    elif args.command == 'prune':
+        for name, outcome in prune(args.keep_days, args.unused_days).items():
+            print(f"{name}: {outcome}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import random
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from services import metrics
+
+if TYPE_CHECKING:
+    import requests
+
+# requests is imported on first use, keeping it off the login and register pages' startup
+
+# Connection pool sizing - pool_maxsize bounds concurrent connections per host
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 20
+
+# Retry policy for transient failures
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_TIMEOUT = 10
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+_lock = threading.Lock()
+_adapter = None
+_retry_class = None
+_generation = 0
+_local = threading.local()
+
+
+def _new_adapter(pool_connections: int, pool_maxsize: int):
+    """Create a pooled adapter that retries connection errors, 429 and 5xx for every request through it"""
+    global _retry_class
+    from requests.adapters import HTTPAdapter
+    from urllib3.util import Retry
+
+    if _retry_class is None:
+        class JitteredRetry(Retry):
+            # Full jitter keeps many sessions from retrying in lockstep; Retry-After still wins when sent
+            def get_backoff_time(self):
+                return backoff_delay(len(self.history) - 1) if self.history else 0
+
+        _retry_class = JitteredRetry
+
+    retry = _retry_class(
+        total=MAX_RETRIES,
+        status_forcelist=RETRY_STATUSES,
+        backoff_factor=BACKOFF_BASE,
+        respect_retry_after_header=True,
+        allowed_methods=None,
+        raise_on_status=False
+    )
+    return HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+
+def configure(pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None):
+    """Resize the shared connection pool; sessions pick up the new pool on next use"""
+    global _adapter, _generation
+
+    with _lock:
+        old_adapter = _adapter
+        _adapter = _new_adapter(
+            pool_connections or (old_adapter._pool_connections if old_adapter else POOL_CONNECTIONS),
+            pool_maxsize or (old_adapter._pool_maxsize if old_adapter else POOL_MAXSIZE)
+        )
+        _generation += 1
+    if old_adapter is not None:
+        old_adapter.close()
+
+
+def get_session() -> 'requests.Session':
+    """Get this thread's session, backed by the process-wide keep-alive connection pool"""
+    global _adapter
+    # Sessions are not safe to share across threads, but the adapter's urllib3 pool is
+    session = getattr(_local, 'session', None)
+    if session is None or _local.generation != _generation:
+        import requests
+
+        with _lock:
+            if _adapter is None:
+                _adapter = _new_adapter(POOL_CONNECTIONS, POOL_MAXSIZE)
+            session = requests.Session()
+            session.headers['User-Agent'] = USER_AGENT
+            # Counts response bytes against the provider request being made
+            session.hooks['response'].append(metrics.record_response)
+            session.mount('https://', _adapter)
+            session.mount('http://', _adapter)
+            _local.session = session
+            _local.generation = _generation
+    return session
+
+
+def backoff_delay(attempt: int) -> float:
+    """Get the wait before a retry: capped exponential with full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def get(url: str, params: Optional[dict] = None, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> 'requests.Response':
+    """GET through the shared pool; the pool's adapter retries connection errors, 429 and 5xx"""
+    response = get_session().get(url, params=params, timeout=timeout, **kwargs)
+    response.raise_for_status()
+    return response
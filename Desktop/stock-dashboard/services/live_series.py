@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.streaming_indicators import IndicatorStream
+
+COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# Bars kept per (ticker, interval) - a week of 1m bars is ~2,700
+LIVE_SERIES_CAPACITY = 5000
+# Live series kept in memory before the least recently used one is dropped
+MAX_LIVE_SERIES = 256
+
+
+class RingBuffer:
+    """Fixed-capacity, array-backed OHLCV bar buffer; the oldest bars are overwritten when full"""
+
+    def __init__(self, capacity: int = LIVE_SERIES_CAPACITY, tz: Optional[str] = None):
+        self.capacity = capacity
+        self.tz = tz
+        self._times = np.empty(capacity, dtype=np.int64)  # bar open, ns since epoch (UTC)
+        self._values = np.empty((capacity, len(COLUMNS)), dtype=np.float64)
+        self._start = 0
+        self._size = 0
+        self.fetched_at = 0.0
+        self.lock = threading.Lock()
+        self.indicators = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _slot(self, offset: int) -> int:
+        return (self._start + offset) % self.capacity
+
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        """Get the open time of the newest bar"""
+        if self._size == 0:
+            return None
+        return pd.Timestamp(self._times[self._slot(self._size - 1)], tz='UTC').tz_convert(self.tz)
+
+    def _bar(self, timestamp_ns, values):
+        bar = dict(zip(COLUMNS, values.tolist()))
+        bar['Timestamp'] = pd.Timestamp(timestamp_ns, tz='UTC').tz_convert(self.tz)
+        return bar
+
+    def append(self, timestamp_ns: int, values: np.ndarray):
+        """Add a bar, replacing the newest one if it has the same open time"""
+        if self._size:
+            last = self._slot(self._size - 1)
+            if timestamp_ns == self._times[last]:
+                # The newest bar was still forming when it was stored
+                self._values[last] = values
+                if self.indicators is not None:
+                    self.indicators.revise(self._bar(timestamp_ns, values))
+                return
+            if timestamp_ns < self._times[last]:
+                return
+
+        if self._size < self.capacity:
+            slot = self._slot(self._size)
+            self._size += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._times[slot] = timestamp_ns
+        self._values[slot] = values
+        if self.indicators is not None:
+            self.indicators.update(self._bar(timestamp_ns, values))
+
+    def extend(self, frame: pd.DataFrame):
+        """Append every bar in a yfinance-shaped frame that is not older than the newest bar"""
+        if frame is None or frame.empty:
+            return
+        if self.tz is None and frame.index.tz is not None:
+            self.tz = str(frame.index.tz)
+
+        times = frame.index.asi8
+        values = frame.loc[:, list(COLUMNS)].to_numpy(dtype=np.float64)
+        if self._size == 0 and len(frame) >= self.capacity:
+            # Initial fill larger than the buffer - keep only the newest bars
+            self._times[:] = times[-self.capacity:]
+            self._values[:] = values[-self.capacity:]
+            self._start = 0
+            self._size = self.capacity
+            if self.indicators is not None:
+                self.attach_indicators(self.indicators.specs)
+            return
+        for timestamp_ns, row in zip(times, values):
+            self.append(int(timestamp_ns), row)
+
+    def clear(self):
+        """Drop every buffered bar, e.g. before reseeding a series that fell too far behind"""
+        self._start = 0
+        self._size = 0
+        if self.indicators is not None:
+            self.attach_indicators(self.indicators.specs)
+
+    def attach_indicators(self, specs):
+        """Track streaming indicators over the buffer, updated in O(1) as bars arrive"""
+        self.indicators = IndicatorStream.from_history(self.to_frame(), specs)
+        return self.indicators
+
+    def to_frame(self) -> pd.DataFrame:
+        """Get the buffered bars, oldest first, as a DataFrame"""
+        order = (self._start + np.arange(self._size)) % self.capacity
+        index = pd.DatetimeIndex(self._times[order], tz='UTC')
+        if self.tz is not None:
+            index = index.tz_convert(self.tz)
+        return pd.DataFrame(self._values[order], index=index, columns=list(COLUMNS))
+
+    def memory_bytes(self) -> int:
+        """Get the fixed memory held by the buffer's arrays"""
+        return self._times.nbytes + self._values.nbytes
+
+
+_series = OrderedDict()
+_series_lock = threading.Lock()
+
+
+def get_series(ticker: str, interval: str) -> RingBuffer:
+    """Get the live buffer for a ticker and interval, creating it if needed"""
+    key = (ticker.upper(), interval)
+    with _series_lock:
+        series = _series.get(key)
+        if series is None:
+            series = RingBuffer()
+            _series[key] = series
+            while len(_series) > MAX_LIVE_SERIES:
+                _series.popitem(last=False)
+        else:
+            _series.move_to_end(key)
+        return series
+
+
+def is_fresh(series: RingBuffer, max_age: float) -> bool:
+    """Check whether a buffer was topped up within max_age seconds"""
+    return len(series) > 0 and time.time() - series.fetched_at < max_age
+
+
+def get_live_stats() -> dict:
+    """Get the number of live series and the memory they hold"""
+    with _series_lock:
+        buffers = list(_series.values())
+    return {
+        'series': len(buffers),
+        'bars': sum(len(buffer) for buffer in buffers),
+        'bytes': sum(buffer.memory_bytes() for buffer in buffers),
+    }
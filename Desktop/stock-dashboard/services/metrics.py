@@ -0,0 +1,328 @@
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Set METRICS_FILE to keep a Prometheus text-format file up to date (e.g. for node_exporter's textfile collector)
+METRICS_FILE = os.environ.get('METRICS_FILE')
+METRICS_WRITE_INTERVAL = 15
+
+# Latency bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Every exported metric as name -> (type, help)
+METRICS = {
+    'stock_dashboard_call_duration_seconds': ('histogram', "Latency of stock data calls, including cache hits"),
+    'stock_dashboard_call_errors_total': ('counter', "Stock data calls that failed, by exception type"),
+    'stock_dashboard_call_rows_total': ('counter', "Rows returned by stock data calls"),
+    'stock_dashboard_call_cache_total': ('counter', "Stock data calls by whether they made their own upstream request"),
+    'stock_dashboard_upstream_duration_seconds': ('histogram', "Latency of provider requests, including rate limit waits"),
+    'stock_dashboard_upstream_errors_total': ('counter', "Provider requests that failed, by exception type"),
+    'stock_dashboard_upstream_bytes_total': ('counter', "HTTP response bytes received from the provider"),
+    'stock_dashboard_cache_hits_total': ('counter', "Hits in each in-process cache"),
+    'stock_dashboard_cache_misses_total': ('counter', "Misses in each in-process cache"),
+    'stock_dashboard_cache_entries': ('gauge', "Entries held by each in-process cache"),
+    'stock_dashboard_cache_bytes': ('gauge', "Approximate bytes held by each in-process cache"),
+}
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, tuple], float] = {}
+_histograms: Dict[Tuple[str, tuple], 'Histogram'] = {}
+_collectors: List[Callable[[], List[Tuple[str, dict, float]]]] = []
+_current_call = contextvars.ContextVar('metrics_call', default=None)
+_current_upstream = contextvars.ContextVar('metrics_upstream', default=None)
+_exporter = None
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self) -> 'Histogram':
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.sum = self.sum
+        histogram.count = self.count
+        return histogram
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by interpolating inside its bucket"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower  # beyond the largest bucket
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class _Call:
+    __slots__ = ('rows', 'upstream')
+
+    def __init__(self):
+        self.rows = None
+        self.upstream = False
+
+
+def exchange_of(tickers) -> str:
+    """Get the exchange suffix label of a ticker (US for none), or 'mixed' for several exchanges"""
+    if tickers is None:
+        return ''
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    suffixes = {ticker.rsplit('.', 1)[1].upper() if '.' in ticker else 'US' for ticker in tickers}
+    if len(suffixes) == 1:
+        return suffixes.pop()
+    return 'mixed' if suffixes else ''
+
+
+def _key(name: str, labels: dict) -> Tuple[str, tuple]:
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name: str, amount: float = 1, **labels):
+    """Add to a counter"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name: str, value: float, **labels):
+    """Record a value in a histogram"""
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+
+@contextmanager
+def track(endpoint: str, tickers=None):
+    """Time a stock data call, counting its errors, rows (set call.rows) and whether it went upstream"""
+    _ensure_exporter()
+    labels = {'endpoint': endpoint, 'exchange': exchange_of(tickers)}
+    call = _Call()
+    token = _current_call.set(call)
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        inc('stock_dashboard_call_errors_total', error=type(e).__name__, **labels)
+        raise
+    finally:
+        observe('stock_dashboard_call_duration_seconds', time.perf_counter() - start, **labels)
+        _current_call.reset(token)
+        inc('stock_dashboard_call_cache_total', result='miss' if call.upstream else 'hit', **labels)
+        if call.rows:
+            inc('stock_dashboard_call_rows_total', call.rows, **labels)
+
+
+@contextmanager
+def upstream(endpoint: str, tickers=None):
+    """Time a provider request; HTTP responses inside it are counted against the same labels"""
+    labels = {'endpoint': endpoint, 'exchange': exchange_of(tickers)}
+    call = _current_call.get()
+    if call is not None:
+        call.upstream = True
+    token = _current_upstream.set(labels)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        inc('stock_dashboard_upstream_errors_total', error=type(e).__name__, **labels)
+        raise
+    finally:
+        observe('stock_dashboard_upstream_duration_seconds', time.perf_counter() - start, **labels)
+        _current_upstream.reset(token)
+
+
+def record_response(response, *args, **kwargs):
+    """requests response hook counting bytes received against the current provider request"""
+    labels = _current_upstream.get() or {'endpoint': 'unattributed', 'exchange': ''}
+    length = response.headers.get('Content-Length')
+    if length is not None and length.isdigit():
+        size = int(length)  # bytes on the wire, before decompression
+    elif not kwargs.get('stream'):
+        size = len(response.content)
+    else:
+        return
+    inc('stock_dashboard_upstream_bytes_total', size, **labels)
+
+
+def register_collector(collector: Callable[[], List[Tuple[str, dict, float]]]):
+    """Add a function returning (name, labels, value) samples read at export time"""
+    with _lock:
+        _collectors.append(collector)
+
+
+def collect_samples() -> List[Tuple[str, tuple, float]]:
+    """Read the samples of every registered collector"""
+    samples = []
+    for collector in list(_collectors):
+        try:
+            samples.extend((name, tuple(sorted(labels.items())), value) for name, labels, value in collector())
+        except Exception as e:
+            print(f"Error collecting metrics: {e}")
+    return samples
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value) -> str:
+    """Format a sample value without losing precision, e.g. large byte counters"""
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def render_prometheus() -> str:
+    """Render every metric in the Prometheus text exposition format"""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: histogram.copy() for key, histogram in _histograms.items()}
+    samples: Dict[str, List[str]] = {}
+    for (name, labels), value in counters.items():
+        samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    for name, labels, value in collect_samples():
+        samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    for (name, labels), histogram in histograms.items():
+        lines = samples.setdefault(name, [])
+        cumulative = 0
+        for bound, bucket_count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+            cumulative += bucket_count
+            le = bound if bound == '+Inf' else f"{bound:g}"
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+    output = []
+    for name in sorted(samples):
+        kind, help_text = METRICS.get(name, ('untyped', name))
+        output.append(f"# HELP {name} {help_text}")
+        output.append(f"# TYPE {name} {kind}")
+        output.extend(sorted(samples[name]) if kind != 'histogram' else samples[name])
+    return '\n'.join(output) + '\n'
+
+
+def write_prometheus(path: str = METRICS_FILE):
+    """Write the metrics file atomically, so scrapers never read half of it"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as file:
+        file.write(render_prometheus())
+    os.replace(temp_path, path)
+
+
+def _export_loop(path: str, interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            write_prometheus(path)
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
+
+
+def _ensure_exporter():
+    """Start the metrics file writer on first use when METRICS_FILE is set"""
+    global _exporter
+    if not METRICS_FILE or _exporter is not None:
+        return
+    with _lock:
+        if _exporter is None:
+            _exporter = threading.Thread(
+                target=_export_loop,
+                args=(METRICS_FILE, METRICS_WRITE_INTERVAL),
+                name="metrics-exporter",
+                daemon=True
+            )
+            _exporter.start()
+
+
+def summary() -> List[dict]:
+    """Get one row per (endpoint, exchange) of call and upstream figures, for display"""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: histogram.copy() for key, histogram in _histograms.items()}
+
+    rows = {}
+
+    def row(labels):
+        labels = dict(labels)
+        key = (labels.get('endpoint', ''), labels.get('exchange', ''))
+        return rows.setdefault(key, {
+            'endpoint': key[0], 'exchange': key[1], 'calls': 0, 'errors': 0, 'hits': 0,
+            'rows': 0, 'upstream': 0, 'upstream_errors': 0, 'bytes': 0,
+        })
+
+    for (name, labels), histogram in histograms.items():
+        entry = row(labels)
+        prefix = 'call' if name == 'stock_dashboard_call_duration_seconds' else 'upstream'
+        entry['calls' if prefix == 'call' else 'upstream'] = histogram.count
+        for q in (0.5, 0.95):
+            value = histogram.quantile(q)
+            entry[f"{prefix}_p{int(q * 100)}_ms"] = None if value is None else value * 1000
+        entry[f"{prefix}_mean_ms"] = histogram.sum / histogram.count * 1000 if histogram.count else None
+
+    fields = {
+        'stock_dashboard_call_errors_total': 'errors',
+        'stock_dashboard_call_rows_total': 'rows',
+        'stock_dashboard_upstream_errors_total': 'upstream_errors',
+        'stock_dashboard_upstream_bytes_total': 'bytes',
+    }
+    for (name, labels), value in counters.items():
+        if name in fields:
+            row(labels)[fields[name]] += value
+        elif name == 'stock_dashboard_call_cache_total' and dict(labels).get('result') == 'hit':
+            row(labels)['hits'] += value
+
+    for entry in rows.values():
+        entry['hit_ratio'] = entry['hits'] / entry['calls'] if entry['calls'] else None
+    return sorted(rows.values(), key=lambda entry: (entry['endpoint'], entry['exchange']))
+
+
+def errors() -> List[dict]:
+    """Get error counts by endpoint, exchange, exception type and layer"""
+    with _lock:
+        counters = dict(_counters)
+    layers = {
+        'stock_dashboard_call_errors_total': 'call',
+        'stock_dashboard_upstream_errors_total': 'upstream',
+    }
+    return sorted(
+        (dict(labels, layer=layers[name], count=int(value))
+         for (name, labels), value in counters.items() if name in layers),
+        key=lambda entry: -entry['count']
+    )
+
+
+def reset():
+    """Drop every recorded metric, keeping registered collectors"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
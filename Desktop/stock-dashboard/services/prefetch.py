@@ -0,0 +1,211 @@
+import argparse
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from services import rate_limiter
+
+# Seconds between prefetch passes over every user's favourites; 0 leaves only the pre-open warm
+PREFETCH_INTERVAL = int(os.environ.get('PREFETCH_INTERVAL', 300))
+# Set PREFETCH_ENABLED=0 to keep the server from prefetching (e.g. when a worker does it)
+PREFETCH_ENABLED = os.environ.get('PREFETCH_ENABLED', '1').lower() not in ('0', 'false', 'no')
+# History periods warmed for each ticker - the dashboard opens on 1 month
+PREFETCH_PERIODS = tuple(os.environ.get('PREFETCH_PERIODS', '1mo').split(','))
+# Seconds before an exchange opens that its tickers are warmed
+PREOPEN_LEAD = int(os.environ.get('PREOPEN_LEAD', 300))
+# Tickers warmed side by side; the rate limiter still decides how fast they go
+PREFETCH_WORKERS = 4
+# Longest sleep before re-reading favourites, so new favourites get a pre-open warm
+MAX_SLEEP = 3600
+
+# Local opening time of each exchange timezone (holidays are not tracked)
+MARKET_OPENS = {
+    'Asia/Kolkata': (9, 15),
+    'Asia/Hong_Kong': (9, 30),
+    'Europe/London': (8, 0),
+    'America/New_York': (9, 30),
+}
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+_stop = threading.Event()
+_last_pass = {}
+
+
+def favourite_tickers() -> List[str]:
+    """Get the deduplicated union of every user's favourites, most popular first"""
+    from utils.settings_manager import load_all_favourites
+
+    counts = {}
+    for favourites in load_all_favourites().values():
+        for ticker in dict.fromkeys(ticker.strip().upper() for ticker in favourites if ticker):
+            counts[ticker] = counts.get(ticker, 0) + 1
+    return sorted(counts, key=lambda ticker: (-counts[ticker], ticker))
+
+
+def tickers_by_exchange(tickers: List[str]) -> Dict[str, List[str]]:
+    """Group tickers by the timezone of the exchange they trade on"""
+    from services.providers import _exchange_timezone
+
+    groups = {}
+    for ticker in tickers:
+        groups.setdefault(_exchange_timezone(ticker), []).append(ticker)
+    return groups
+
+
+def next_open(tz: str, after: Optional[float] = None) -> float:
+    """Get the epoch time of an exchange's next weekday open after the given time"""
+    import pandas as pd
+
+    hour, minute = MARKET_OPENS[tz]
+    after = time.time() if after is None else after
+    day = pd.Timestamp(after, unit='s', tz=tz).normalize()
+    for offset in range(8):
+        # Replacing the wall-clock time keeps 9:15 at 9:15 across DST changes
+        opening = (day + pd.DateOffset(days=offset)).replace(hour=hour, minute=minute)
+        if opening.weekday() < 5 and opening.timestamp() > after:
+            return opening.timestamp()
+    raise RuntimeError(f"No opening time found for {tz}")
+
+
+def prefetch(tickers: List[str], periods=PREFETCH_PERIODS, quote_ttl: Optional[float] = None) -> dict:
+    """Warm quotes and history for tickers at background priority, sharing the rate limit with visitors"""
+    from services.stock_data import prefetch_ticker
+
+    def warm(ticker):
+        with rate_limiter.priority(rate_limiter.BACKGROUND):
+            return prefetch_ticker(ticker, periods, quote_ttl)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch") as pool:
+        results = list(pool.map(lambda ticker: contextvars.copy_context().run(warm, ticker), tickers))
+    summary = {
+        'tickers': len(tickers),
+        'failed': results.count(False),
+        'seconds': round(time.perf_counter() - start, 1),
+        'finished_at': time.time(),
+    }
+    print(f"Prefetched {summary['tickers']} tickers in {summary['seconds']}s ({summary['failed']} failed)")
+    return summary
+
+
+def prefetch_favourites(quote_ttl: Optional[float] = None) -> dict:
+    """Warm every user's favourites once"""
+    summary = prefetch(favourite_tickers(), quote_ttl=quote_ttl)
+    _last_pass['favourites'] = summary
+    return summary
+
+
+def prefetch_before_open(tz: str, opening: float) -> dict:
+    """Warm the favourites trading in one timezone, holding their quotes until just after the open"""
+    from services.stock_data import QUOTE_CACHE_TTL
+
+    tickers = tickers_by_exchange(favourite_tickers()).get(tz, [])
+    # Quotes do not move before the open, so they stay cached until then
+    quote_ttl = max(0, opening - time.time()) + QUOTE_CACHE_TTL
+    summary = prefetch(tickers, quote_ttl=quote_ttl)
+    _last_pass[tz] = summary
+    return summary
+
+
+def _next_preopen(lead: float):
+    """Get (warm time, timezone, opening time) of the next pre-open warm, or None without favourites"""
+    upcoming = []
+    for tz in tickers_by_exchange(favourite_tickers()):
+        if tz in MARKET_OPENS:
+            # Skip an open whose warm window has already begun
+            opening = next_open(tz, time.time() + lead)
+            upcoming.append((opening - lead, tz, opening))
+    return min(upcoming) if upcoming else None
+
+
+def run_schedule(interval: float = PREFETCH_INTERVAL, lead: float = PREOPEN_LEAD):
+    """Prefetch favourites every interval seconds and lead seconds before each exchange opens, until stopped"""
+    next_pass = time.time() if interval > 0 else float('inf')
+    while not _stop.is_set():
+        try:
+            preopen = _next_preopen(lead)
+        except Exception as e:
+            print(f"Error planning prefetch: {e}")
+            preopen = None
+
+        wake = next_pass
+        if preopen is not None and preopen[0] < wake:
+            wake = preopen[0]
+        delay = max(0, wake - time.time())
+        if delay > MAX_SLEEP:
+            if _stop.wait(MAX_SLEEP):
+                return
+            continue
+        if _stop.wait(delay):
+            return
+
+        try:
+            if preopen is not None and wake == preopen[0]:
+                prefetch_before_open(preopen[1], preopen[2])
+            else:
+                prefetch_favourites()
+                next_pass = time.time() + interval
+        except Exception as e:
+            print(f"Error prefetching favourites: {e}")
+            if wake == next_pass:
+                next_pass = time.time() + interval
+
+
+def start_prefetcher(interval: float = PREFETCH_INTERVAL, lead: float = PREOPEN_LEAD):
+    """Start the in-process prefetch thread if it is enabled and not already running"""
+    global _scheduler
+    if not PREFETCH_ENABLED:
+        return
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _stop.clear()
+            _scheduler = threading.Thread(
+                target=run_schedule,
+                args=(interval, lead),
+                name="favourites-prefetch",
+                daemon=True
+            )
+            _scheduler.start()
+
+
+def stop_prefetcher():
+    """Stop the prefetch thread after its current pass"""
+    _stop.set()
+
+
+def get_prefetch_stats() -> dict:
+    """Get the summary of the last pass of each kind"""
+    return {kind: dict(summary) for kind, summary in _last_pass.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefetch quotes and history for every user's favourites")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="Keep prefetching on a schedule (a separate worker process)")
+    run_parser.add_argument('--interval', type=float, default=PREFETCH_INTERVAL, help="Seconds between passes")
+    run_parser.add_argument('--lead', type=float, default=PREOPEN_LEAD, help="Seconds before each open to warm")
+    commands.add_parser('once', help="Prefetch every favourite once")
+    commands.add_parser('list', help="Print the favourites that would be prefetched, by exchange")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        try:
+            run_schedule(args.interval, args.lead)
+        except KeyboardInterrupt:
+            pass
+    elif args.command == 'once':
+        prefetch_favourites()
+    elif args.command == 'list':
+        import pandas as pd
+
+        for tz, tickers in tickers_by_exchange(favourite_tickers()).items():
+            opening = pd.Timestamp(next_open(tz), unit='s', tz='UTC').tz_convert(tz).strftime('%a %Y-%m-%d %H:%M')
+            print(f"{tz} (next open {opening}): {', '.join(tickers)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+import contextvars
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services import http_client, rate_limiter
+
+SEARCH_URL = "https://query1.finance.yahoo.com/v1/finance/search"
+# Tickers of a batched download fetched side by side, each on its own pooled session
+DOWNLOAD_WORKERS = 8
+
+# Calendar days spanned by yfinance period strings
+PERIOD_DAYS = {
+    '1d': 1,
+    '5d': 5,
+    '1wk': 7,
+    '1mo': 31,
+    '3mo': 92,
+    '6mo': 183,
+    '1y': 366,
+    '2y': 731,
+    '5y': 1827,
+    '10y': 3653,
+    'max': 3653,
+}
+
+INTRADAY_MINUTES = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60}
+
+FIXTURE_DIR = "fixtures"
+
+
+class MarketDataProvider:
+    """Source of history, quotes and search results behind services.stock_data"""
+
+    name = "base"
+    # Whether fetched history should be persisted in the local history store
+    persist_history = False
+
+    def history(self, ticker: str, period: Optional[str] = None, start: Optional[str] = None,
+                interval: str = "1d") -> pd.DataFrame:
+        """Get OHLCV bars for a period, or from a start date onwards"""
+        raise NotImplementedError
+
+    def info(self, ticker: str) -> dict:
+        """Get the yfinance-style info dict for a ticker"""
+        raise NotImplementedError
+
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        """Get up to limit {'symbol', 'name', 'exchange'} matches for a query"""
+        raise NotImplementedError
+
+    def download(self, tickers: List[str], period: str = "1mo") -> pd.DataFrame:
+        """Get bars for many tickers at once, columns keyed by (ticker, field)"""
+        frames = {ticker: self.history(ticker, period=period) for ticker in tickers}
+        return pd.concat({ticker: frame for ticker, frame in frames.items() if not frame.empty}, axis=1)
+
+
+class YahooProvider(MarketDataProvider):
+    """Live Yahoo Finance data through yfinance and the search API"""
+
+    name = "yahoo"
+    persist_history = True
+
+    def _ticker(self, ticker):
+        # yfinance is imported on first use, usually in a fetch worker while the page renders
+        import yfinance as yf
+
+        # Talk through the shared keep-alive connection pool
+        return yf.Ticker(ticker, session=http_client.get_session())
+
+    def history(self, ticker, period=None, start=None, interval="1d"):
+        rate_limiter.acquire('history')
+        if start is not None:
+            return self._ticker(ticker).history(start=start, interval=interval)
+        return self._ticker(ticker).history(period=period or "1mo", interval=interval)
+
+    def info(self, ticker):
+        rate_limiter.acquire('info')
+        return self._ticker(ticker).info
+
+    def search(self, query, limit=10):
+        rate_limiter.acquire('search')
+        response = http_client.get(SEARCH_URL, params={
+            'q': query,
+            'lang': 'en-US',
+            'region': 'US',
+            'quotesCount': limit,
+            'newsCount': 0
+        })
+        data = response.json()
+        return [
+            {
+                'symbol': quote.get('symbol', ''),
+                'name': quote.get('longname', quote.get('shortname', '')),
+                'exchange': quote.get('exchange', '')
+            }
+            for quote in data.get('quotes', [])
+        ]
+
+    def download(self, tickers, period="1mo"):
+        # yf.download() cannot take a session, so each ticker goes through the pooled, retrying one
+        def fetch(ticker):
+            # Every ticker is its own request, so each one waits for its own token
+            rate_limiter.acquire('history')
+            try:
+                frame = self._ticker(ticker).history(period=period)
+            except Exception as e:
+                # One delisted or failing symbol leaves the rest of the watchlist intact
+                print(f"Error downloading {ticker}: {str(e)}")
+                return pd.DataFrame()
+            # Daily bars of different exchanges line up by date, as yf.download(ignore_tz=True) did
+            if frame.index.tz is not None:
+                frame.index = frame.index.tz_localize(None)
+            return frame
+
+        workers = min(DOWNLOAD_WORKERS, len(tickers)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as pool:
+            # One context copy per ticker keeps response bytes counted against this download
+            contexts = [contextvars.copy_context() for _ in tickers]
+            frames = dict(zip(tickers, pool.map(lambda context, ticker: context.run(fetch, ticker), contexts, tickers)))
+        frames = {ticker: frame for ticker, frame in frames.items() if not frame.empty}
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+
+def _exchange_timezone(ticker: str) -> str:
+    if ticker.endswith('.NS') or ticker.endswith('.BO'):
+        return 'Asia/Kolkata'
+    elif ticker.endswith('.L'):
+        return 'Europe/London'
+    elif ticker.endswith('.HK'):
+        return 'Asia/Hong_Kong'
+    return 'America/New_York'
+
+
+def _align_start(start, tz) -> pd.Timestamp:
+    # Start may be a date string or a timestamp from a stored bar
+    start_ts = pd.Timestamp(start)
+    if tz is None:
+        return start_ts.tz_localize(None) if start_ts.tz is not None else start_ts
+    return start_ts.tz_localize(tz) if start_ts.tz is None else start_ts.tz_convert(tz)
+
+
+def random_walk_frame(rows: int, start: str = "2000-01-03", freq: str = "B", seed: int = 0,
+                      start_price: float = 100.0, volatility: float = 0.02,
+                      tz: Optional[str] = None) -> pd.DataFrame:
+    """Generate a yfinance-shaped OHLCV frame following a geometric random walk"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start=start, periods=rows, freq=freq, tz=tz)
+
+    close = start_price * np.exp(np.cumsum(rng.normal(0, volatility, rows)))
+    open_ = np.empty(rows)
+    open_[0] = start_price
+    open_[1:] = close[:-1] * np.exp(rng.normal(0, volatility / 4, rows - 1))
+    spread = np.abs(rng.normal(0, volatility / 2, rows))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = rng.lognormal(mean=14, sigma=0.5, size=rows).round()
+
+    return pd.DataFrame({
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': volume,
+        'Dividends': 0.0,
+        'Stock Splits': 0.0,
+    }, index=index)
+
+
+class SyntheticProvider(MarketDataProvider):
+    """Deterministic random-walk data generated locally, seeded per ticker"""
+
+    name = "synthetic"
+    # Daily paths start here so bars for a given date never change between calls
+    EPOCH = "2015-01-01"
+
+    def __init__(self, seed: int = 0, volatility: float = 0.02):
+        self.seed = seed
+        self.volatility = volatility
+
+    def _ticker_seed(self, *parts) -> int:
+        return zlib.crc32('|'.join(str(part) for part in (self.seed,) + parts).encode())
+
+    def _daily(self, ticker):
+        today = datetime.now(timezone.utc).date()
+        index = pd.bdate_range(self.EPOCH, today)
+        frame = random_walk_frame(
+            len(index),
+            start=self.EPOCH,
+            seed=self._ticker_seed(ticker),
+            start_price=20 + self._ticker_seed(ticker, 'price') % 480,
+            volatility=self.volatility
+        )
+        frame.index = index.tz_localize(_exchange_timezone(ticker))
+        return frame
+
+    def _intraday(self, ticker, interval, days):
+        minutes = INTRADAY_MINUTES[interval]
+        daily = self._daily(ticker).tail(days)
+        frames = []
+        for day, row in daily.iterrows():
+            # 6.5 trading hours from the open, each day anchored on the daily open
+            session_open = day.normalize() + timedelta(hours=9, minutes=30)
+            frame = random_walk_frame(
+                390 // minutes,
+                start=session_open.tz_localize(None),
+                freq=f"{minutes}min",
+                seed=self._ticker_seed(ticker, interval, day.date()),
+                start_price=row['Open'],
+                volatility=self.volatility / 20
+            )
+            frame.index = frame.index.tz_localize(day.tz)
+            frames.append(frame)
+        return pd.concat(frames)
+
+    def history(self, ticker, period=None, start=None, interval="1d"):
+        days = PERIOD_DAYS.get(period or "1mo", 31)
+        if interval in INTRADAY_MINUTES:
+            data = self._intraday(ticker, interval, min(days, 60))
+        else:
+            data = self._daily(ticker)
+        if start is not None:
+            start_ts = _align_start(start, data.index.tz)
+        else:
+            start_ts = data.index[-1].normalize() - timedelta(days=days)
+        return data[data.index >= start_ts]
+
+    def info(self, ticker):
+        closes = self._daily(ticker)['Close']
+        return {
+            'longName': f"{ticker.upper()} Synthetic Inc.",
+            'currentPrice': float(closes.iloc[-1]),
+            'previousClose': float(closes.iloc[-2]),
+            'marketCap': float(closes.iloc[-1]) * (1e8 + self._ticker_seed(ticker, 'shares') % int(1e10)),
+        }
+
+    def search(self, query, limit=10):
+        symbol = re.sub(r'[^A-Z0-9]', '', query.upper())[:6] or "SYN"
+        suffixes = ['', '.NS', '.BO', '.L', '.TO', '.HK']
+        return [
+            {'symbol': f"{symbol}{suffix}", 'name': f"{query.title()} Synthetic", 'exchange': 'SYN'}
+            for suffix in suffixes
+        ][:limit]
+
+
+def _fixture_key(*parts) -> str:
+    return re.sub(r'[^A-Za-z0-9._^=-]', '_', '_'.join(str(part) for part in parts))
+
+
+class FixtureProvider(MarketDataProvider):
+    """Replays responses captured by RecordingProvider, with configurable latency"""
+
+    name = "fixture"
+
+    def __init__(self, directory: str = FIXTURE_DIR, latency: float = 0.0, jitter: float = 0.0):
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+
+    def _wait(self):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _path(self, kind, key, ext):
+        return os.path.join(self.directory, kind, f"{key}.{ext}")
+
+    def _read_json(self, kind, key):
+        path = self._path(kind, key, 'json')
+        if not os.path.exists(path):
+            raise KeyError(f"No {kind} fixture for '{key}'")
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def history(self, ticker, period=None, start=None, interval="1d"):
+        self._wait()
+        path = self._path('history', _fixture_key(ticker.upper(), interval), 'parquet')
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        data = pd.read_parquet(path)
+        if start is not None:
+            start_ts = _align_start(start, data.index.tz)
+        else:
+            start_ts = data.index[-1].normalize() - timedelta(days=PERIOD_DAYS.get(period or "1mo", 31))
+        return data[data.index >= start_ts]
+
+    def info(self, ticker):
+        self._wait()
+        return self._read_json('info', _fixture_key(ticker.upper()))
+
+    def search(self, query, limit=10):
+        self._wait()
+        return self._read_json('search', _fixture_key(query))[:limit]
+
+
+class RecordingProvider(MarketDataProvider):
+    """Passes calls through to another provider and captures responses as fixtures"""
+
+    name = "record"
+
+    def __init__(self, inner: MarketDataProvider, directory: str = FIXTURE_DIR):
+        self.inner = inner
+        self.directory = directory
+        self.persist_history = inner.persist_history
+        self._lock = threading.Lock()
+
+    def _write_json(self, kind, key, payload):
+        os.makedirs(os.path.join(self.directory, kind), exist_ok=True)
+        with open(os.path.join(self.directory, kind, f"{key}.json"), 'w') as f:
+            json.dump(payload, f, indent=2, default=str)
+
+    def history(self, ticker, period=None, start=None, interval="1d"):
+        data = self.inner.history(ticker, period=period, start=start, interval=interval)
+        if not data.empty:
+            path = os.path.join(self.directory, 'history', f"{_fixture_key(ticker.upper(), interval)}.parquet")
+            with self._lock:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if os.path.exists(path):
+                    merged = pd.concat([pd.read_parquet(path), data])
+                    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                else:
+                    merged = data
+                merged.to_parquet(path)
+        return data
+
+    def info(self, ticker):
+        info = self.inner.info(ticker)
+        with self._lock:
+            self._write_json('info', _fixture_key(ticker.upper()), info)
+        return info
+
+    def search(self, query, limit=10):
+        results = self.inner.search(query, limit)
+        with self._lock:
+            self._write_json('search', _fixture_key(query), results)
+        return results
+
+
+_provider: Optional[MarketDataProvider] = None
+_provider_lock = threading.Lock()
+
+
+def create_provider(name: str, **options) -> MarketDataProvider:
+    """Build a provider by name: yahoo, synthetic, fixture or record"""
+    if name == "yahoo":
+        return YahooProvider()
+    elif name == "synthetic":
+        return SyntheticProvider(seed=int(options.get('seed', 0)))
+    elif name == "fixture":
+        return FixtureProvider(
+            directory=options.get('directory', FIXTURE_DIR),
+            latency=float(options.get('latency', 0.0)),
+            jitter=float(options.get('jitter', 0.0))
+        )
+    elif name == "record":
+        return RecordingProvider(YahooProvider(), directory=options.get('directory', FIXTURE_DIR))
+    raise ValueError(f"Unknown market data provider '{name}'")
+
+
+def get_provider() -> MarketDataProvider:
+    """Get the active provider, configured from STOCK_DATA_* environment variables on first use"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = create_provider(
+                os.environ.get('STOCK_DATA_PROVIDER', 'yahoo'),
+                directory=os.environ.get('STOCK_DATA_FIXTURES', FIXTURE_DIR),
+                latency=os.environ.get('STOCK_DATA_LATENCY', 0.0),
+                jitter=os.environ.get('STOCK_DATA_JITTER', 0.0),
+                seed=os.environ.get('STOCK_DATA_SEED', 0)
+            )
+        return _provider
+
+
+def set_provider(provider: MarketDataProvider):
+    """Replace the active provider, e.g. with a fixture provider for tests or benchmarks"""
+    global _provider
+    with _provider_lock:
+        _provider = provider
@@ -0,0 +1,140 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Priority classes - lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 10
+
+# Per-endpoint limits as (tokens per second, burst capacity)
+RATE_LIMITS = {
+    'search': (5.0, 10),
+    'history': (2.0, 5),
+    'info': (2.0, 5),
+}
+
+_current_priority = contextvars.ContextVar('request_priority', default=INTERACTIVE)
+
+
+class TokenBucket:
+    """Token bucket that hands out tokens to waiters in priority order"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters = []  # heap of (priority, sequence) tickets
+        self._sequence = itertools.count()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: int = INTERACTIVE, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting only while the bucket is empty or higher priorities queue"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] == ticket and self._tokens >= 1:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= 1
+                        self._cond.notify_all()
+                        return True
+
+                    # Sleep until the next token is due; the head waiter wakes the rest
+                    wait = (1 - self._tokens) / self.rate if self._tokens < 1 else None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._waiters.remove(ticket)
+                            heapq.heapify(self._waiters)
+                            self._cond.notify_all()
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+    def stats(self) -> dict:
+        """Get the bucket's configuration, available tokens and queue depth"""
+        with self._cond:
+            self._refill()
+            return {
+                'rate': self.rate,
+                'capacity': self.capacity,
+                'tokens': self._tokens,
+                'waiting': len(self._waiters),
+            }
+
+
+_buckets: Dict[str, TokenBucket] = {
+    endpoint: TokenBucket(rate, capacity) for endpoint, (rate, capacity) in RATE_LIMITS.items()
+}
+_buckets_lock = threading.Lock()
+
+
+def configure(endpoint: str, rate: float, capacity: float):
+    """Set the rate and burst capacity for an endpoint"""
+    with _buckets_lock:
+        bucket = _buckets.get(endpoint)
+        if bucket is None:
+            _buckets[endpoint] = TokenBucket(rate, capacity)
+        else:
+            with bucket._cond:
+                bucket._refill()
+                bucket.rate = rate
+                bucket.capacity = capacity
+                bucket._tokens = min(bucket._tokens, capacity)
+                bucket._cond.notify_all()
+
+
+def get_bucket(endpoint: str) -> TokenBucket:
+    """Get the shared bucket for an endpoint"""
+    with _buckets_lock:
+        if endpoint not in _buckets:
+            raise KeyError(f"No rate limit configured for endpoint '{endpoint}'")
+        return _buckets[endpoint]
+
+
+def acquire(endpoint: str, priority: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+    """Wait for a token on an endpoint using the given or current priority"""
+    if priority is None:
+        priority = _current_priority.get()
+    return get_bucket(endpoint).acquire(priority, timeout)
+
+
+def current_priority() -> int:
+    """Get the priority class of the running request"""
+    return _current_priority.get()
+
+
+@contextmanager
+def priority(level: int):
+    """Run provider calls in this block at the given priority class"""
+    token = _current_priority.set(level)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def get_limiter_stats() -> Dict[str, dict]:
+    """Get token and queue stats for every endpoint"""
+    with _buckets_lock:
+        buckets = dict(_buckets)
+    return {endpoint: bucket.stats() for endpoint, bucket in buckets.items()}
@@ -1,98 +1,418 @@
-import yfinance as yf
 import pandas as pd
-import requests
-import json
+import contextvars
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services import history_store, live_series, metrics, rate_limiter
+from services.cache import SharedCache, TTLCache, frame_size, freeze_frame
+from services.coalesce import SingleFlight
+from services.providers import get_provider
+
+# Concurrent identical upstream calls share one request; failures are briefly remembered
+_flights = SingleFlight()
+
+# History frames shared by every session; reloaded in the background ahead of expiry
+HISTORY_CACHE_TTL = 60
+HISTORY_CACHE_MAX_BYTES = int(os.environ.get('HISTORY_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+_history_cache = SharedCache(
+    ttl=HISTORY_CACHE_TTL,
+    max_bytes=HISTORY_CACHE_MAX_BYTES,
+    sizeof=frame_size,
+    refresh_context=lambda: rate_limiter.priority(rate_limiter.BACKGROUND)
+)
+
+# Quote cache settings - quotes change slowly relative to Streamlit reruns
+QUOTE_CACHE_TTL = 60
+QUOTE_CACHE_MAX_ENTRIES = 512
+QUOTE_CACHE_MAX_BYTES = 2 * 1024 * 1024
+
+_quote_cache = TTLCache(
+    ttl=QUOTE_CACHE_TTL,
+    max_entries=QUOTE_CACHE_MAX_ENTRIES,
+    max_bytes=QUOTE_CACHE_MAX_BYTES
+)
+_watchlist_cache = TTLCache(ttl=QUOTE_CACHE_TTL, max_entries=64)
+
+# Search cache settings - results are keyed by normalized query
+SEARCH_CACHE_TTL = 300
+SEARCH_CACHE_MAX_ENTRIES = 1024
+SEARCH_RESULT_LIMIT = 10
+
+_search_cache = TTLCache(ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_MAX_ENTRIES)
+
+# Intraday intervals as (initial period, bar seconds, lookback days) - Yahoo serves 1m bars for 7 days only
+INTRADAY_INTERVALS = {
+    '1m': ('5d', 60, 7),
+    '5m': ('1mo', 300, 60),
+    '15m': ('1mo', 900, 60)
+}
+# Seconds a live series is served from memory before newer bars are fetched
+LIVE_REFRESH_SECONDS = 15
+
+# Shared pool for fetches that run alongside the Streamlit script thread
+FETCH_WORKERS = 8
+_fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="stock-fetch")
+
+class NoDataError(LookupError):
+    """Raised when the provider has nothing for a ticker"""
 
 def get_stock_data(ticker, period="1mo"):
-    """Fetch stock data with better error handling"""
+    """Get a read-only frame of stock data shared by all sessions, topping up only the missing tail"""
     try:
-        # Add a small delay to avoid rate limiting
-        time.sleep(0.5)
-        
-        stock = yf.Ticker(ticker)
-        data = stock.history(period=period)
-        
-        if data.empty:
-            print(f"No data found for {ticker}")
-            return None
-            
+        with metrics.track('history', ticker) as call:
+            data = _history_cache.get_or_load(('history', ticker.upper(), period), _load_history, ticker, period)
+            call.rows = len(data)
         return data
+    except NoDataError:
+        print(f"No data found for {ticker}")
+        return None
     except Exception as e:
         print(f"Error fetching data for {ticker}: {str(e)}")
-        # Try alternative approach
-        try:
-            stock = yf.download(ticker, period=period, progress=False)
-            return stock
-        except:
-            return None
+        return None
 
-def get_stock_info(ticker):
-    """Get basic stock information with better error handling"""
-    try:
-        time.sleep(0.5)  # Rate limiting
-        
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        # Check if info is valid
-        if not info or 'currentPrice' not in info:
-            # Fallback to history data for price
-            hist = stock.history(period="1d")
-            if not hist.empty:
-                current_price = hist['Close'].iloc[-1]
-                previous_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-            else:
-                current_price = 0
-                previous_close = 0
+def _load_history(ticker, period):
+    """Fetch history once across concurrent callers and freeze it for sharing"""
+    return freeze_frame(_flights.do(('history', ticker.upper(), period), _fetch_history, ticker, period))
+
+def _fetch_history(ticker, period):
+    """Fetch a period of history from the provider - run once per (ticker, period) at a time"""
+    provider = get_provider()
+    start = history_store.period_start(period)
+    if start is None or not provider.persist_history:
+        # Local providers and periods the store cannot map go straight to the provider
+        with metrics.upstream('history', ticker):
+            data = provider.history(ticker, period=period)
+    else:
+        data = _top_up_history(ticker, period, start)
+    
+    if data is None or data.empty:
+        raise NoDataError(ticker)
+    return data
+
+def _top_up_history(ticker, period, start):
+    """Serve a period from the history store, fetching only what it is missing"""
+    provider = get_provider()
+    meta = history_store.load_meta(ticker)
+    
+    if meta.get('covered_from', '9999-12-31') > start:
+        # Store does not reach back far enough - fetch the whole period once
+        with metrics.upstream('history', ticker):
+            fresh = provider.history(ticker, period=period)
+        history_store.append_history(ticker, fresh, covered_from=start)
+    elif history_store.is_stale(meta):
+        # Re-fetch from the last stored bar so a partial bar gets replaced
+        last_bar = meta['last_bar'][:10]
+        with metrics.upstream('history', ticker):
+            fresh = provider.history(ticker, start=last_bar)
+        if fresh.empty:
+            history_store.touch_history(ticker)
+        elif history_store.has_new_corporate_actions(ticker, fresh):
+            # Adjusted prices shifted for every stored bar - rewrite the whole range
+            covered_from = meta.get('covered_from', start)
+            with metrics.upstream('history', ticker):
+                full = provider.history(ticker, start=covered_from)
+            history_store.replace_history(ticker, full, covered_from=covered_from)
         else:
-            current_price = info.get('currentPrice', 0)
-            previous_close = info.get('previousClose', 0)
-        
-        currency_symbol = get_currency_symbol(ticker)
+            history_store.append_history(ticker, fresh)
+    
+    return history_store.read_history(ticker, start=start)
+
+def get_intraday_data(ticker, interval="5m"):
+    """Get intraday bars from the ticker's live ring buffer, fetching only bars after the newest one"""
+    try:
+        with metrics.track('intraday', ticker) as call:
+            data = _flights.do(('intraday', ticker.upper(), interval), _top_up_intraday, ticker, interval)
+            call.rows = len(data)
+        return data
+    except NoDataError:
+        print(f"No intraday data found for {ticker}")
+        return None
+    except Exception as e:
+        print(f"Error fetching intraday data for {ticker}: {str(e)}")
+        return None
+
+def _top_up_intraday(ticker, interval):
+    """Append new bars to the live series - run once per (ticker, interval) at a time"""
+    initial_period, _, lookback_days = INTRADAY_INTERVALS[interval]
+    series = live_series.get_series(ticker, interval)
+    
+    with series.lock:
+        if not live_series.is_fresh(series, LIVE_REFRESH_SECONDS):
+            last_bar = series.last_timestamp()
+            # Yahoo rejects starts beyond the interval's lookback, so a series that far behind is reseeded
+            reseed = last_bar is not None and last_bar < pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=lookback_days)
+            with metrics.upstream('intraday', ticker):
+                if last_bar is None or reseed:
+                    fresh = get_provider().history(ticker, period=initial_period, interval=interval)
+                else:
+                    # Starts at the newest bar so a bar that was still forming gets replaced
+                    fresh = get_provider().history(ticker, start=last_bar, interval=interval)
+            if fresh is not None and not fresh.empty:
+                if reseed:
+                    # Old bars would leave a gap the indicators run straight across
+                    series.clear()
+                series.extend(fresh)
+                # An empty answer leaves the series stale, so the next call asks again
+                series.fetched_at = time.time()
         
-        return {
-            'name': info.get('longName', info.get('shortName', ticker)),
-            'current_price': current_price,
-            'previous_close': previous_close,
-            'market_cap': info.get('marketCap', 0),
-            'currency_symbol': currency_symbol
-        }
+        if len(series) == 0:
+            raise NoDataError(ticker)
+        return series.to_frame()
+
+def get_live_indicators(ticker, interval, specs):
+    """Get the latest streaming indicator values for a live intraday series"""
+    series = live_series.get_series(ticker, interval)
+    with series.lock:
+        if len(series) == 0:
+            return {}
+        if series.indicators is None or series.indicators.specs != list(dict.fromkeys(specs)):
+            # Replays the buffer once; later bars update each indicator in constant time
+            series.attach_indicators(specs)
+        return {spec: dict(values) for spec, values in series.indicators.latest.items()}
+
+def get_stock_info(ticker):
+    """Get basic stock information, served from the quote cache when fresh"""
+    try:
+        with metrics.track('info', ticker):
+            cached = _quote_cache.get(ticker.upper())
+            if cached is not None:
+                return dict(cached)
+            quote = _flights.do(('info', ticker.upper()), _fetch_stock_info, ticker)
+        return dict(quote)
     except Exception as e:
         print(f"Error fetching info for {ticker}: {str(e)}")
         return None
 
-def yahoo_search_stocks(query):
-    """Search using Yahoo Finance autocomplete with better error handling"""
-    if len(query) < 2:
+def _fetch_stock_info(ticker, ttl=None):
+    """Fetch a quote from the provider and cache it - run once per ticker at a time"""
+    provider = get_provider()
+    with metrics.upstream('info', ticker):
+        info = provider.info(ticker)
+    
+    # Check if info is valid
+    if not info or 'currentPrice' not in info:
+        # Fallback to history data for price
+        with metrics.upstream('history', ticker):
+            hist = provider.history(ticker, period="1d")
+        if not hist.empty:
+            current_price = hist['Close'].iloc[-1]
+            previous_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
+        else:
+            current_price = 0
+            previous_close = 0
+    else:
+        current_price = info.get('currentPrice', 0)
+        previous_close = info.get('previousClose', 0)
+    
+    currency_symbol = get_currency_symbol(ticker)
+    
+    quote = {
+        'name': info.get('longName', info.get('shortName', ticker)),
+        'current_price': current_price,
+        'previous_close': previous_close,
+        'market_cap': info.get('marketCap', 0),
+        'currency_symbol': currency_symbol
+    }
+    _quote_cache.set(ticker.upper(), quote, ttl)
+    return quote
+
+def prefetch_ticker(ticker, periods=("1mo",), quote_ttl=None):
+    """Load a ticker's quote and history into the shared caches ahead of a visit; returns False on any failure"""
+    ok = True
+    try:
+        # Always re-fetched, so a pre-open warm can keep the quote until the open
+        _flights.do(('info', ticker.upper()), _fetch_stock_info, ticker, quote_ttl)
+    except Exception as e:
+        print(f"Error prefetching info for {ticker}: {str(e)}")
+        ok = False
+    for period in periods:
+        # Fresh entries are left alone; ageing ones start their background refresh
+        ok = get_stock_data(ticker, period) is not None and ok
+    return ok
+
+class StockFetch:
+    """Quote and history fetches for one ticker running side by side"""
+    
+    def __init__(self, ticker, period, interval, info_future, data_future):
+        self.ticker = ticker
+        self.period = period
+        self.interval = interval
+        self.info_future = info_future
+        self.data_future = data_future
+    
+    def result(self, timeout=None):
+        """Wait for both fetches and return (stock_info, stock_data)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        stock_info = self.info_future.result(timeout)
+        remaining = None if deadline is None else max(0, deadline - time.monotonic())
+        stock_data = self.data_future.result(remaining)
+        return stock_info, stock_data
+
+def _submit(fn, *args):
+    # Carry the caller's context (e.g. request priority) into the worker thread
+    return _fetch_pool.submit(contextvars.copy_context().run, fn, *args)
+
+def start_stock_fetch(ticker, period="1mo", interval="1d"):
+    """Start fetching quote and history (daily or intraday) concurrently without waiting"""
+    if interval in INTRADAY_INTERVALS:
+        data_future = _submit(get_intraday_data, ticker, interval)
+    else:
+        data_future = _submit(get_stock_data, ticker, period)
+    return StockFetch(ticker, period, interval, _submit(get_stock_info, ticker), data_future)
+
+def fetch_stock_bundle(ticker, period="1mo", interval="1d", timeout=None):
+    """Fetch quote and history together in the wall time of the slower one"""
+    return start_stock_fetch(ticker, period, interval).result(timeout)
+
+def get_watchlist_overview(tickers, period="1mo"):
+    """Summarise many tickers from a single batched multi-symbol download"""
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    if not tickers:
         return []
     
+    cache_key = (tuple(sorted(tickers)), period)
     try:
-        time.sleep(0.3)  # Rate limiting
-        
-        url = f"https://query1.finance.yahoo.com/v1/finance/search?q={query}&lang=en-US&region=US&quotesCount=10&newsCount=0"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
+        with metrics.track('watchlist', tickers) as call:
+            cached = _watchlist_cache.get(cache_key)
+            if cached is not None:
+                return [dict(row) for row in cached]
+            with metrics.upstream('download', tickers):
+                data = get_provider().download(tickers, period=period)
+            call.rows = 0 if data is None else len(data)
+    except Exception as e:
+        print(f"Error fetching watchlist: {str(e)}")
+        return []
+    
+    if data is None or data.empty:
+        return []
+    
+    overview = []
+    for ticker in tickers:
+        # Multi-symbol downloads are keyed by (ticker, field); a single symbol is not
+        if isinstance(data.columns, pd.MultiIndex):
+            if ticker not in data.columns.get_level_values(0):
+                continue
+            frame = data[ticker]
+        else:
+            frame = data
+        frame = frame.dropna(subset=['Close'])
+        if frame.empty:
+            continue
         
-        if response.status_code == 200:
-            data = response.json()
-            suggestions = []
-            
-            for quote in data.get('quotes', []):
-                suggestions.append({
-                    'symbol': quote.get('symbol', ''),
-                    'name': quote.get('longname', quote.get('shortname', '')),
-                    'exchange': quote.get('exchange', '')
-                })
-            return suggestions
+        last_price = float(frame['Close'].iloc[-1])
+        previous_close = float(frame['Close'].iloc[-2]) if len(frame) > 1 else last_price
+        first_close = float(frame['Close'].iloc[0])
+        overview.append({
+            'ticker': ticker,
+            'currency_symbol': get_currency_symbol(ticker),
+            'last_price': last_price,
+            'change_percent': (last_price - previous_close) / previous_close * 100 if previous_close > 0 else 0,
+            'period_change_percent': (last_price - first_close) / first_close * 100 if first_close > 0 else 0,
+            'period_low': float(frame['Low'].min()),
+            'period_high': float(frame['High'].max())
+        })
+    
+    _watchlist_cache.set(cache_key, overview)
+    return [dict(row) for row in overview]
+
+def get_history_cache_stats():
+    """Get hit/miss/refresh counters and memory use of the shared history cache"""
+    return _history_cache.stats()
+
+def clear_history_cache():
+    """Drop every shared history frame, e.g. after switching providers"""
+    _history_cache.clear()
+
+def get_quote_cache_stats():
+    """Get hit/miss/eviction counters for the quote cache"""
+    return _quote_cache.stats()
+
+def configure_quote_cache(ttl=None, max_entries=None, max_bytes=None):
+    """Adjust quote cache limits at runtime"""
+    if ttl is not None:
+        _quote_cache.ttl = ttl
+    if max_entries is not None:
+        _quote_cache.max_entries = max_entries
+    if max_bytes is not None:
+        _quote_cache.max_bytes = max_bytes
+
+def _normalize_query(query):
+    return ' '.join(query.lower().split())
+
+def _matches_query(suggestion, query):
+    text = f"{suggestion['symbol'] or ''} {suggestion['name'] or ''}".lower()
+    return all(token in text for token in query.split())
+
+def _search_from_prefix(query):
+    """Answer a query by filtering the longest complete cached result for one of its prefixes"""
+    for end in range(len(query) - 1, 1, -1):
+        prefix = query[:end]
+        if prefix not in _search_cache:
+            continue
+        cached = _search_cache.get(prefix)
+        if cached is not None and cached['complete']:
+            return [suggestion for suggestion in cached['results'] if _matches_query(suggestion, query)]
+    return None
+
+def yahoo_search_stocks(query):
+    """Search using Yahoo Finance autocomplete, reusing cached results where possible"""
+    query = _normalize_query(query)
+    if len(query) < 2:
         return []
+    
+    try:
+        with metrics.track('search') as call:
+            cached = _search_cache.get(query)
+            if cached is not None:
+                suggestions = cached['results']
+            else:
+                suggestions = _search_from_prefix(query)
+                if suggestions is not None:
+                    # A filtered complete result set is itself complete
+                    _search_cache.set(query, {'results': suggestions, 'complete': True})
+                else:
+                    suggestions = _flights.do(('search', query), _fetch_search, query)
+            call.rows = len(suggestions)
+        return [dict(suggestion) for suggestion in suggestions]
     except Exception as e:
         print(f"Search error: {str(e)}")
         return []
 
+def _fetch_search(query):
+    """Run a search against the provider and cache it - run once per query at a time"""
+    with metrics.upstream('search'):
+        suggestions = get_provider().search(query, SEARCH_RESULT_LIMIT)
+    # Fewer results than requested means Yahoo returned every match
+    _search_cache.set(query, {
+        'results': suggestions,
+        'complete': len(suggestions) < SEARCH_RESULT_LIMIT
+    })
+    return suggestions
+
+def get_search_cache_stats():
+    """Get hit/miss/eviction counters for the search cache"""
+    return _search_cache.stats()
+
+def get_coalescing_stats():
+    """Get in-flight and coalesced call counters for upstream requests"""
+    return _flights.stats()
+
+def _cache_metrics():
+    """Export the in-process caches' counters as metrics samples"""
+    samples = []
+    for cache, stats in (('history', _history_cache.stats()), ('quote', _quote_cache.stats()),
+                         ('watchlist', _watchlist_cache.stats()), ('search', _search_cache.stats())):
+        labels = {'cache': cache}
+        samples.append(('stock_dashboard_cache_hits_total', labels, stats['hits']))
+        samples.append(('stock_dashboard_cache_misses_total', labels, stats['misses']))
+        samples.append(('stock_dashboard_cache_entries', labels, stats['entries']))
+        samples.append(('stock_dashboard_cache_bytes', labels, stats['bytes']))
+    return samples
+
+metrics.register_collector(_cache_metrics)
+
 def get_currency_symbol(ticker):
     """Determine currency symbol based on stock ticker"""
     if ticker.endswith('.NS') or ticker.endswith('.BO'):
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app's packages the same way the pages do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory, since the stores write relative to the working directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def reset_provider(monkeypatch):
+    """Give each test a fresh provider slot so set_provider() does not leak between tests"""
+    from services import providers
+
+    monkeypatch.setattr(providers, '_provider', None)
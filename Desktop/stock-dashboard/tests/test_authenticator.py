@@ -0,0 +1,25 @@
+import bcrypt
+
+from utils import authenticator
+from utils.authenticator import Authenticator
+
+
+def test_login_checks_password_through_pool(monkeypatch):
+    hashed = bcrypt.hashpw(b'secret1', bcrypt.gensalt(4)).decode()
+    calls = []
+
+    def verify(password, stored):
+        calls.append(stored)
+        return bcrypt.checkpw(password.encode(), stored.encode())
+
+    monkeypatch.setattr(authenticator, 'verify_password', verify)
+    # The cookie manager set up in __init__ needs a running Streamlit app
+    auth = object.__new__(Authenticator)
+    auth.credentials = {'usernames': {'alice': {'password': hashed}}}
+    auth.username = 'alice'
+
+    auth.password = 'secret1'
+    assert auth._check_pw()
+    auth.password = 'wrong'
+    assert not auth._check_pw()
+    assert calls == [hashed, hashed]
@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.cache import freeze_frame
+
+
+def test_freeze_frame_leaves_source_writable():
+    source = pd.DataFrame({'Close': np.arange(3.0), 'Volume': np.arange(3)})
+    frozen = freeze_frame(source)
+
+    with pytest.raises(ValueError):
+        frozen.loc[0, 'Close'] = 5.0
+    assert np.shares_memory(frozen['Close'].to_numpy(), source['Close'].to_numpy())
+
+    source.loc[0, 'Close'] = 5.0
+    assert source['Close'].to_numpy().flags.writeable
+    assert list(frozen.columns) == list(source.columns) and frozen.index is source.index
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.charts import chart_arrays
+
+
+def test_chart_arrays_leave_frame_writable():
+    index = pd.date_range('2024-01-01', periods=5, tz='UTC')
+    data = pd.DataFrame({
+        'Open': np.arange(5.0), 'High': np.arange(5.0), 'Low': np.arange(5.0),
+        'Close': np.arange(5.0), 'Volume': np.arange(5.0),
+    }, index=index)
+    naive = pd.DataFrame({'Close': np.arange(3.0)}, index=pd.date_range('2024-01-01', periods=3))
+
+    arrays = chart_arrays(data)
+    naive_arrays = chart_arrays(naive)
+    assert not any(values.flags.writeable for values in arrays.values())
+    with pytest.raises(ValueError):
+        arrays['Close'][0] = 1.0
+
+    assert all(block.values.flags.writeable for block in data._mgr.blocks)
+    assert np.shares_memory(naive_arrays['x'], naive.index.to_numpy())
+    assert naive.index.to_numpy().flags.writeable
+    data.iloc[0, 0] = 10.0
+    naive.iloc[0, 0] = 10.0
+    assert arrays['Open'][0] == 10.0  # still a view, not a copy
+
+
+def test_zoomed_indicators_match_full_history():
+    from services.providers import random_walk_frame
+    from utils.charts import create_indicator_chart
+    from utils.indicators import compute_indicators
+
+    history = random_walk_frame(400, seed=11)
+    zoom = history.iloc[250:300]
+    fig = create_indicator_chart(zoom, 'ZOOM', ['RSI:14'], history=history)
+
+    expected = compute_indicators(history, ['RSI:14'])['RSI:14']['RSI 14'][250:300]
+    np.testing.assert_array_equal(np.asarray(fig.data[0].y, dtype=float), expected)
+    assert not np.isnan(expected).any()  # the warm-up happened before the zoom range
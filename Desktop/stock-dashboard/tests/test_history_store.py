@@ -0,0 +1,86 @@
+import pandas as pd
+
+from services import history_store, stock_data
+from services.providers import MarketDataProvider, set_provider
+
+
+def _bars(dates, close, splits=None):
+    index = pd.DatetimeIndex(pd.to_datetime(dates)).tz_localize('America/New_York')
+    return pd.DataFrame({
+        'Open': close, 'High': close, 'Low': close, 'Close': close,
+        'Volume': [1000] * len(dates),
+        'Dividends': [0.0] * len(dates),
+        'Stock Splits': splits or [0.0] * len(dates),
+    }, index=index)
+
+
+class SplitProvider(MarketDataProvider):
+    """Adjusted daily bars for a ticker that splits 2:1 on the third day"""
+
+    persist_history = True
+
+    def __init__(self):
+        self.split = False
+        self.calls = []
+
+    def history(self, ticker, period=None, start=None, interval="1d"):
+        self.calls.append(start or period)
+        if not self.split:
+            return _bars(['2024-01-02', '2024-01-03'], [100.0, 102.0])
+        full = _bars(['2024-01-02', '2024-01-03', '2024-01-04'], [50.0, 51.0, 52.0], [0.0, 0.0, 2.0])
+        if start is not None and start >= '2024-01-03':
+            return full.iloc[1:]
+        return full
+
+
+def test_split_rewrites_stored_bars(workdir, monkeypatch):
+    provider = SplitProvider()
+    set_provider(provider)
+    monkeypatch.setattr(history_store, 'is_stale', lambda meta: True)
+
+    first = stock_data._top_up_history('SPLT', '1y', '2023-12-01')
+    assert list(first['Close']) == [100.0, 102.0]
+
+    provider.split = True
+    data = stock_data._top_up_history('SPLT', '1y', '2023-12-01')
+
+    # Every earlier bar carries the new adjustment, with no jump at the split
+    assert list(data['Close']) == [50.0, 51.0, 52.0]
+    assert provider.calls[-1] == '2023-12-01'
+    assert len(history_store._list_segments(history_store.get_ticker_dir('SPLT'))) == 1
+
+
+def test_known_split_is_not_refetched(workdir, monkeypatch):
+    provider = SplitProvider()
+    provider.split = True
+    set_provider(provider)
+    monkeypatch.setattr(history_store, 'is_stale', lambda meta: True)
+
+    stock_data._top_up_history('SPLT', '1y', '2023-12-01')
+    calls = len(provider.calls)
+    stock_data._top_up_history('SPLT', '1y', '2023-12-01')
+
+    # Only the tail top-up, no second full rewrite
+    assert len(provider.calls) == calls + 1
+
+
+def test_read_retries_when_a_segment_disappears(workdir, monkeypatch):
+    history_store.append_history('RACE', _bars(['2024-01-02'], [10.0]))
+    history_store.append_history('RACE', _bars(['2024-01-03'], [11.0]))
+    read_parquet = pd.read_parquet
+    failures = []
+
+    def flaky_read(path, *args, **kwargs):
+        if not failures:
+            # As if a compaction removed this segment between the listing and the read
+            failures.append(path)
+            raise FileNotFoundError(path)
+        return read_parquet(path, *args, **kwargs)
+
+    monkeypatch.setattr(pd, 'read_parquet', flaky_read)
+    data = history_store.read_history('RACE')
+    assert failures and list(data['Close']) == [10.0, 11.0]
+
+
+def test_ticker_lock_is_shared_across_spellings():
+    assert history_store._get_ticker_lock('reliance.ns') is history_store._get_ticker_lock('RELIANCE.NS')
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from services import http_client, rate_limiter
+from services.providers import YahooProvider
+
+
+def test_session_retries_throttling_and_server_errors(monkeypatch):
+    monkeypatch.setattr(http_client, '_adapter', None)
+    monkeypatch.setattr(http_client._local, 'session', None, raising=False)
+    retry = http_client.get_session().get_adapter('https://query1.finance.yahoo.com').max_retries
+    assert retry.total == http_client.MAX_RETRIES
+    assert set(retry.status_forcelist) == http_client.RETRY_STATUSES
+    assert retry.respect_retry_after_header
+    assert retry.allowed_methods is None
+    assert retry.is_retry('GET', 429) and not retry.is_retry('GET', 404)
+
+
+class _FakeTicker:
+    def __init__(self, ticker, session):
+        self.ticker = ticker
+        self.session = session
+
+    def history(self, period):
+        if self.ticker == 'GONE':
+            raise ValueError("No data found, symbol may be delisted")
+        index = pd.date_range('2024-01-02', periods=2, tz='Asia/Kolkata' if self.ticker.endswith('.NS') else 'America/New_York')
+        return pd.DataFrame({'Close': [1.0, 2.0]}, index=index)
+
+
+def test_download_uses_pooled_sessions(monkeypatch):
+    provider = YahooProvider()
+    sessions = []
+
+    def fake_ticker(ticker):
+        session = http_client.get_session()
+        sessions.append(session)
+        return _FakeTicker(ticker, session)
+
+    monkeypatch.setattr(provider, '_ticker', fake_ticker)
+    monkeypatch.setattr(rate_limiter, 'acquire', lambda *args, **kwargs: None)
+    data = provider.download(['AAPL', 'TCS.NS'], period='5d')
+    assert list(data.columns.get_level_values(0).unique()) == ['AAPL', 'TCS.NS']
+    assert len(data) == 2  # both exchanges' bars line up by date
+    assert all(session.get_adapter('https://').max_retries.total == http_client.MAX_RETRIES for session in sessions)
+
+
+def test_download_takes_a_token_per_ticker_and_skips_failures(monkeypatch):
+    provider = YahooProvider()
+    tokens = []
+    monkeypatch.setattr(provider, '_ticker', lambda ticker: _FakeTicker(ticker, None))
+    monkeypatch.setattr(rate_limiter, 'acquire', lambda endpoint, *args, **kwargs: tokens.append(endpoint))
+    data = provider.download(['AAPL', 'GONE', 'MSFT'], period='5d')
+    assert tokens == ['history'] * 3
+    assert list(data.columns.get_level_values(0).unique()) == ['AAPL', 'MSFT']
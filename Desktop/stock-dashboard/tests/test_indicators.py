@@ -0,0 +1,28 @@
+import numpy as np
+
+from services.providers import random_walk_frame
+from utils.indicators import compute_indicators
+
+
+def test_missing_closes_only_blank_their_windows():
+    data = random_walk_frame(500, seed=3)
+    data.loc[data.index[[100, 250, 251, 400]], 'Close'] = np.nan
+    results = compute_indicators(data, ['SMA:20', 'BB:20:2'])
+
+    expected_mean = data['Close'].rolling(20).mean().to_numpy()
+    expected_std = data['Close'].rolling(20).std(ddof=0).to_numpy()
+    np.testing.assert_allclose(results['SMA:20']['SMA 20'], expected_mean, rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(results['BB:20:2']['BB 20 Upper'], expected_mean + 2 * expected_std,
+                               rtol=1e-9, equal_nan=True)
+    assert not np.isnan(results['SMA:20']['SMA 20'][-1])
+
+
+def test_memo_sees_rewritten_earlier_bars():
+    data = random_walk_frame(300, seed=5)
+    before = compute_indicators(data, ['SMA:20'], key=('MEMO', '1y'))['SMA:20']['SMA 20']
+
+    # A split re-adjustment halves every bar but the newest
+    adjusted = data.copy()
+    adjusted.iloc[:-1, adjusted.columns.get_indexer(['Open', 'High', 'Low', 'Close'])] /= 2
+    after = compute_indicators(adjusted, ['SMA:20'], key=('MEMO', '1y'))['SMA:20']['SMA 20']
+    assert not np.allclose(before[-5:], after[-5:])
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from services import live_series, stock_data
+from services.providers import MarketDataProvider, set_provider
+
+
+def _minute_bars(start, count):
+    index = pd.date_range(start, periods=count, freq='1min', tz='America/New_York')
+    return pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 100.0}, index=index)
+
+
+class IntradayProvider(MarketDataProvider):
+    """Minute bars served from a queue, recording how each request was made"""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def history(self, ticker, period=None, start=None, interval="1d"):
+        self.calls.append(('start', start) if start is not None else ('period', period))
+        return self.answers.pop(0)
+
+
+def test_empty_top_up_leaves_series_stale():
+    now = pd.Timestamp.now(tz='America/New_York').floor('min')
+    provider = IntradayProvider([_minute_bars(now - pd.Timedelta(minutes=5), 5), pd.DataFrame()])
+    set_provider(provider)
+    stock_data._top_up_intraday('EMPTY', '1m')
+    series = live_series.get_series('EMPTY', '1m')
+    series.fetched_at = 0.0  # due for a refresh
+
+    stock_data._top_up_intraday('EMPTY', '1m')
+    assert series.fetched_at == 0.0
+    assert len(series) == 5
+
+
+def test_series_behind_lookback_is_reseeded():
+    now = pd.Timestamp.now(tz='America/New_York').floor('min')
+    recent = _minute_bars(now - pd.Timedelta(minutes=3), 3)
+    provider = IntradayProvider([_minute_bars(now - pd.Timedelta(days=10), 5), recent])
+    set_provider(provider)
+    stock_data._top_up_intraday('BEHIND', '1m')
+    live_series.get_series('BEHIND', '1m').fetched_at = 0.0
+
+    frame = stock_data._top_up_intraday('BEHIND', '1m')
+    assert provider.calls == [('period', '5d'), ('period', '5d')]
+    assert len(frame) == 3
+    assert frame.index[0] == recent.index[0]
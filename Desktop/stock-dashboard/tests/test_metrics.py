@@ -0,0 +1,23 @@
+import pytest
+
+from services import metrics
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _sample(text, prefix):
+    return next(line.rsplit(' ', 1)[1] for line in text.splitlines() if line.startswith(prefix))
+
+
+def test_large_counter_round_trips_exactly():
+    metrics.inc('stock_dashboard_upstream_bytes_total', 123_456_789, endpoint='history', exchange='US')
+    metrics.observe('stock_dashboard_call_duration_seconds', 0.1234567891, endpoint='history', exchange='US')
+    text = metrics.render_prometheus()
+
+    assert int(_sample(text, 'stock_dashboard_upstream_bytes_total{')) == 123_456_789
+    assert float(_sample(text, 'stock_dashboard_call_duration_seconds_sum{')) == 0.1234567891
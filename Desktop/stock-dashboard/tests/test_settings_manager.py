@@ -0,0 +1,48 @@
+import json
+import sqlite3
+from collections import OrderedDict
+
+import pytest
+
+from utils import settings_manager
+
+
+@pytest.fixture(autouse=True)
+def fresh_preferences(workdir, monkeypatch):
+    monkeypatch.setattr(settings_manager, '_cache', OrderedDict())
+    monkeypatch.setattr(settings_manager, '_cache_revision', None)
+    monkeypatch.setattr(settings_manager, '_pending', {})
+    monkeypatch.setattr(settings_manager, 'WRITE_DELAY', 60)
+
+
+def _write_from_other_process(username, key, value):
+    connection = sqlite3.connect(settings_manager.PREFERENCES_DB)
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO preferences (username, key, value, updated_at) VALUES (?, ?, ?, 0)",
+            (username, key, json.dumps(value))
+        )
+        settings_manager._bump_revision(connection)
+    connection.close()
+
+
+def test_reads_see_writes_from_other_processes():
+    settings_manager.save_user_favourites('alice', ['AAPL'])
+    settings_manager.flush_preferences()
+    assert settings_manager.load_user_favourites('alice') == ['AAPL']
+
+    _write_from_other_process('alice', settings_manager.FAVOURITES_KEY, ['MSFT'])
+    assert settings_manager.load_user_favourites('alice') == ['MSFT']
+
+
+def test_unflushed_writes_survive_invalidation():
+    settings_manager.save_user_favourites('bob', ['TCS.NS'])
+    _write_from_other_process('carol', settings_manager.FAVOURITES_KEY, ['INFY.NS'])
+    assert settings_manager.load_user_favourites('bob') == ['TCS.NS']
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings_manager, 'MAX_CACHED_USERS', 2)
+    for username in ('u1', 'u2', 'u3'):
+        settings_manager.load_user_settings(username)
+    assert list(settings_manager._cache) == ['u2', 'u3']
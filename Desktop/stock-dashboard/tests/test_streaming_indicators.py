@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from services.providers import SyntheticProvider, random_walk_frame
+from utils.indicators import compute_indicators
+from utils.streaming_indicators import IndicatorStream, _bars, _is_intraday
+
+SPECS = ['SMA:20', 'SMA:50', 'EMA:20', 'BB:20:2', 'RSI:14', 'MACD:12:26:9', 'ATR:14', 'VWAP']
+
+
+@pytest.fixture(params=['daily', 'intraday'])
+def frame(request):
+    if request.param == 'daily':
+        return random_walk_frame(600, seed=7)
+    return SyntheticProvider().history('CHECK', period='5d', interval='5m')
+
+
+def _stream(data, revise):
+    """Feed every bar, first as a still-forming bar then revised to its final values when revise is set"""
+    stream = IndicatorStream(SPECS, anchor_sessions=_is_intraday(data.index))
+    streamed = {}
+    for bar in _bars(data):
+        if revise:
+            forming = dict(bar, High=bar['Open'], Low=bar['Open'], Close=bar['Open'], Volume=bar['Volume'] / 3)
+            stream.update(forming)
+            latest = stream.revise(bar)
+        else:
+            latest = stream.update(bar)
+        for values in latest.values():
+            for name, value in values.items():
+                streamed.setdefault(name, []).append(value)
+    return streamed
+
+
+def _assert_matches_batch(data, streamed):
+    batch = compute_indicators(data, SPECS)
+    for spec in SPECS:
+        for name, expected in batch[spec].items():
+            np.testing.assert_allclose(np.array(streamed[name]), np.asarray(expected, dtype=float),
+                                       rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=name)
+
+
+def test_update_matches_batch(frame):
+    _assert_matches_batch(frame, _stream(frame, revise=False))
+
+
+def test_revise_matches_batch(frame):
+    _assert_matches_batch(frame, _stream(frame, revise=True))
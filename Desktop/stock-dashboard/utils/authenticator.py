@@ -0,0 +1,11 @@
+import streamlit_authenticator as stauth
+
+from utils.password_hashing import verify_password
+
+
+class Authenticator(stauth.Authenticate):
+    """streamlit-authenticator login that checks passwords in the shared bcrypt pool"""
+
+    def _check_pw(self) -> bool:
+        # The stock check runs bcrypt on the script thread, stalling this session's rerun
+        return verify_password(self.password, self.credentials['usernames'][self.username]['password'])
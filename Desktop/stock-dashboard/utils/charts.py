@@ -1,6 +1,15 @@
+import numpy as np
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
+from plotly.subplots import make_subplots
+
+from utils.downsample import downsample_line, ohlc_buckets
+from utils.indicators import compute_indicators, is_overlay, spec_label
+
+# Most points sent to the browser per trace; longer series are downsampled
+MAX_CHART_POINTS = 2000
+
+INDICATOR_COLORS = ['orange', 'red', 'green', 'purple', 'brown', 'teal', 'magenta', 'gray']
 
 def get_currency_symbol(ticker):
     """Determine currency symbol based on stock ticker"""
@@ -15,14 +24,38 @@ def get_currency_symbol(ticker):
     else:
         return '$'  # Default to US Dollar
 
-def create_line_chart(data, ticker):
+def chart_arrays(data):
+    """Get read-only NumPy views of a frame's dates and OHLCV columns for building traces.
+
+    Build this once per render and pass it as arrays= to the chart functions;
+    the frame itself is never copied or modified.
+    """
+    index = data.index
+    if isinstance(index, pd.DatetimeIndex):
+        # Plotly boxes a DatetimeIndex into Python datetimes one by one; a
+        # wall-clock datetime64 array is serialized directly
+        x = index.tz_localize(None).to_numpy() if index.tz is not None else index.to_numpy()
+    else:
+        x = np.asarray(index)
+    arrays = {'x': x.view()}
+    for column in ('Open', 'High', 'Low', 'Close', 'Volume'):
+        if column in data.columns:
+            arrays[column] = data[column].to_numpy().view()
+    for values in arrays.values():
+        # Only the views are locked; the frame's own blocks stay writable
+        values.flags.writeable = False
+    return arrays
+
+def create_line_chart(data, ticker, max_points=MAX_CHART_POINTS, arrays=None):
     """Create a simple line chart for stock prices with correct currency"""
     currency_symbol = get_currency_symbol(ticker)
+    arrays = arrays or chart_arrays(data)
+    x, close = downsample_line(arrays['x'], arrays['Close'], max_points)
     
     fig = go.Figure()
     fig.add_trace(go.Scatter(
-        x=data.index,
-        y=data['Close'],
+        x=x,
+        y=close,
         mode='lines',
         name=f'{ticker} Close Price',
         line=dict(color='blue', width=2)
@@ -37,16 +70,25 @@ def create_line_chart(data, ticker):
     )
     return fig
 
-def create_candlestick_chart(data, ticker):
+def create_candlestick_chart(data, ticker, max_points=MAX_CHART_POINTS, arrays=None):
     """Create candlestick chart with correct currency"""
     currency_symbol = get_currency_symbol(ticker)
+    arrays = arrays or chart_arrays(data)
+    x, open_, high, low, close = ohlc_buckets(
+        arrays['x'],
+        arrays['Open'],
+        arrays['High'],
+        arrays['Low'],
+        arrays['Close'],
+        max_points
+    )
     
     fig = go.Figure(data=go.Candlestick(
-        x=data.index,
-        open=data['Open'],
-        high=data['High'],
-        low=data['Low'],
-        close=data['Close'],
+        x=x,
+        open=open_,
+        high=high,
+        low=low,
+        close=close,
         name=ticker
     ))
     
@@ -59,16 +101,28 @@ def create_candlestick_chart(data, ticker):
     )
     return fig
 
-def add_moving_averages(fig, data, ticker):
-    """Add moving averages to the chart"""
-    # Calculate moving averages
-    data['MA20'] = data['Close'].rolling(window=20).mean()
-    data['MA50'] = data['Close'].rolling(window=50).mean()
+def _indicator_results(data, specs, key=None, history=None):
+    """Compute indicators over the full history and cut them to the displayed range of it"""
+    if history is None or history is data:
+        return compute_indicators(data, specs, key=key)
+    # Warm-ups run over the whole history, so a zoomed chart shows the same values as the full one
+    results = compute_indicators(history, specs, key=key)
+    start = history.index.searchsorted(data.index[0]) if len(data) else 0
+    stop = start + len(data)
+    return {spec: {name: values[start:stop] for name, values in lines.items()} for spec, lines in results.items()}
+
+def add_moving_averages(fig, data, ticker, max_points=MAX_CHART_POINTS, key=None, arrays=None, history=None):
+    """Add moving averages to the chart without copying or modifying the data frame"""
+    # Calculate moving averages in one shared pass
+    arrays = arrays or chart_arrays(data)
+    results = _indicator_results(data, ['SMA:20', 'SMA:50'], key=key, history=history)
+    ma20_x, ma20 = downsample_line(arrays['x'], results['SMA:20']['SMA 20'], max_points)
+    ma50_x, ma50 = downsample_line(arrays['x'], results['SMA:50']['SMA 50'], max_points)
     
     # Add MA20
     fig.add_trace(go.Scatter(
-        x=data.index,
-        y=data['MA20'],
+        x=ma20_x,
+        y=ma20,
         mode='lines',
         name='MA20',
         line=dict(color='orange', width=1)
@@ -76,11 +130,75 @@ def add_moving_averages(fig, data, ticker):
     
     # Add MA50
     fig.add_trace(go.Scatter(
-        x=data.index,
-        y=data['MA50'],
+        x=ma50_x,
+        y=ma50,
         mode='lines',
         name='MA50',
         line=dict(color='red', width=1)
     ))
     
     return fig
+
+def add_indicators(fig, data, ticker, specs, max_points=MAX_CHART_POINTS, key=None, arrays=None, history=None):
+    """Overlay price-scale indicators (SMA, EMA, Bollinger Bands, VWAP) on a chart"""
+    overlays = [spec for spec in specs if is_overlay(spec)]
+    if not overlays:
+        return fig
+    arrays = arrays or chart_arrays(data)
+    results = _indicator_results(data, overlays, key=key, history=history)
+    
+    color_index = 0
+    for spec in overlays:
+        color = INDICATOR_COLORS[color_index % len(INDICATOR_COLORS)]
+        color_index += 1
+        for name, values in results[spec].items():
+            x, y = downsample_line(arrays['x'], values, max_points)
+            fig.add_trace(go.Scatter(
+                x=x,
+                y=y,
+                mode='lines',
+                name=name,
+                line=dict(color=color, width=1, dash='dot' if spec.upper().startswith('BB') else None)
+            ))
+    
+    return fig
+
+def create_indicator_chart(data, ticker, specs, max_points=MAX_CHART_POINTS, key=None, arrays=None, history=None):
+    """Create stacked panels for oscillators (RSI, MACD, ATR), or None if none were requested"""
+    panels = [spec for spec in specs if not is_overlay(spec)]
+    if not panels:
+        return None
+    arrays = arrays or chart_arrays(data)
+    results = _indicator_results(data, panels, key=key, history=history)
+    
+    fig = make_subplots(
+        rows=len(panels),
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.08,
+        subplot_titles=[spec_label(spec) for spec in panels]
+    )
+    for row, spec in enumerate(panels, start=1):
+        for line_index, (name, values) in enumerate(results[spec].items()):
+            x, y = downsample_line(arrays['x'], values, max_points)
+            if name == 'MACD Histogram':
+                fig.add_trace(go.Bar(x=x, y=y, name=name, marker_color='gray'), row=row, col=1)
+            else:
+                fig.add_trace(go.Scatter(
+                    x=x,
+                    y=y,
+                    mode='lines',
+                    name=name,
+                    line=dict(color=INDICATOR_COLORS[line_index % len(INDICATOR_COLORS)], width=1)
+                ), row=row, col=1)
+        if spec.upper().startswith('RSI'):
+            # Conventional overbought / oversold levels
+            fig.add_hline(y=70, line_dash='dash', line_color='red', row=row, col=1)
+            fig.add_hline(y=30, line_dash='dash', line_color='green', row=row, col=1)
+    
+    fig.update_layout(
+        title=f'{ticker} Indicators',
+        hovermode='x unified',
+        height=150 + 200 * len(panels)
+    )
+    return fig
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Pick row indices with Largest-Triangle-Three-Buckets, keeping the first and last points"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Interior points split into threshold - 2 buckets of near-equal size
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    selected = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_start, next_end = n - 1, n
+        # Third vertex is the average of the next bucket
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        ax, ay = x[selected], y[selected]
+        areas = np.abs(
+            (ax - avg_x) * (y[start:end] - ay) - (ax - x[start:end]) * (avg_y - ay)
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+    return indices
+
+
+def downsample_line(x, y: np.ndarray, threshold: int):
+    """LTTB-downsample a line, skipping leading/trailing gaps such as a moving average warm-up"""
+    y = np.asarray(y, dtype=np.float64)
+    missing = np.isnan(y)
+    if len(y) <= threshold and not missing.any():
+        # Short, gap-free series go out as the caller's arrays, uncopied
+        return x, y
+    valid = np.flatnonzero(~missing)
+    if len(valid) <= threshold:
+        return x[valid], y[valid]
+    x_valid, y_valid = x[valid], y[valid]
+    keep = lttb_indices(_positions(x_valid), y_valid, threshold)
+    return x_valid[keep], y_valid[keep]
+
+
+def ohlc_buckets(x, open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 close: np.ndarray, threshold: int):
+    """Aggregate bars into at most threshold buckets: first open, max high, min low, last close"""
+    n = len(x)
+    if threshold >= n:
+        return x, open_, high, low, close
+
+    starts = np.unique(np.linspace(0, n, threshold, endpoint=False).astype(np.int64))
+    ends = np.append(starts[1:], n) - 1
+    return (
+        x[starts],
+        np.asarray(open_)[starts],
+        np.maximum.reduceat(np.asarray(high), starts),
+        np.minimum.reduceat(np.asarray(low), starts),
+        np.asarray(close)[ends],
+    )
+
+
+def _positions(x) -> np.ndarray:
+    # Datetimes become nanoseconds so triangle areas follow real time spacing
+    if hasattr(x, 'asi8'):
+        return x.asi8.astype(np.float64)
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
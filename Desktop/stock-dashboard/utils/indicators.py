@@ -0,0 +1,254 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Default parameters per indicator; specs look like "SMA:20", "MACD:12:26:9" or "VWAP"
+DEFAULT_PARAMS = {
+    'SMA': (20,),
+    'EMA': (20,),
+    'RSI': (14,),
+    'MACD': (12, 26, 9),
+    'BB': (20, 2),
+    'ATR': (14,),
+    'VWAP': (),
+}
+
+# Indicators drawn over the price chart; the rest get their own panel
+OVERLAY_INDICATORS = {'SMA', 'EMA', 'BB', 'VWAP'}
+
+# Memoized results kept per (key, specs, data fingerprint)
+MAX_MEMOIZED_RESULTS = 128
+
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+
+def parse_spec(spec: str) -> Tuple[str, tuple]:
+    """Split a spec such as "BB:20:2" into ("BB", (20, 2.0)), filling in defaults"""
+    parts = spec.upper().split(':')
+    kind = parts[0]
+    if kind not in DEFAULT_PARAMS:
+        raise ValueError(f"Unknown indicator '{kind}'")
+    defaults = DEFAULT_PARAMS[kind]
+    values = [float(part) if '.' in part else int(part) for part in parts[1:] if part]
+    params = tuple(values) + defaults[len(values):]
+    return kind, params
+
+
+def spec_label(spec: str) -> str:
+    """Get a display label for a spec, e.g. "MACD (12, 26, 9)" """
+    kind, params = parse_spec(spec)
+    if not params:
+        return kind
+    if len(params) == 1:
+        return f"{kind} {params[0]}"
+    return f"{kind} ({', '.join(str(param) for param in params)})"
+
+
+def is_overlay(spec: str) -> bool:
+    """Check whether an indicator is drawn on the price chart"""
+    return parse_spec(spec)[0] in OVERLAY_INDICATORS
+
+
+def _with_warmup(values: np.ndarray, length: int, warmup: int) -> np.ndarray:
+    out = np.full(length, np.nan)
+    out[warmup:] = values
+    return out
+
+
+def _wilder(values: np.ndarray, window: int, seed_index: int) -> np.ndarray:
+    """Wilder smoothing seeded with the mean of the first window values ending at seed_index"""
+    out = np.full(len(values), np.nan)
+    if len(values) <= seed_index:
+        return out
+    seeded = values[seed_index:].copy()
+    seeded[0] = values[seed_index - window + 1:seed_index + 1].mean()
+    out[seed_index:] = pd.Series(seeded).ewm(alpha=1 / window, adjust=False).mean().to_numpy()
+    return out
+
+
+class _Workspace:
+    """Per-frame arrays and intermediates shared between indicators"""
+
+    def __init__(self, data: pd.DataFrame):
+        self.index = data.index
+        self.close = data['Close'].to_numpy(dtype=np.float64)
+        self.high = data['High'].to_numpy(dtype=np.float64)
+        self.low = data['Low'].to_numpy(dtype=np.float64)
+        self.volume = data['Volume'].to_numpy(dtype=np.float64)
+        self.n = len(self.close)
+        valid = self.close[~np.isnan(self.close)]
+        # Rolling sums are taken relative to the first close for precision
+        self.origin = valid[0] if len(valid) else 0.0
+        self._memo = {}
+
+    def _memoized(self, key, compute):
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def close_sums(self):
+        """Prefix sums of close, close squared and valid-close count, offset by the first close for precision"""
+        def compute():
+            valid = ~np.isnan(self.close)
+            # Missing closes add nothing, and the count tells which windows they left short
+            shifted = np.where(valid, self.close - self.origin, 0.0)
+            return (
+                np.concatenate(([0.0], np.cumsum(shifted))),
+                np.concatenate(([0.0], np.cumsum(shifted * shifted))),
+                np.concatenate(([0], np.cumsum(valid))),
+            )
+        return self._memoized('close_sums', compute)
+
+    def _window_sums(self, window: int):
+        """Sum of shifted closes and squares per complete window, NaN where a close is missing"""
+        sums, squares, counts = self.close_sums()
+        complete = (counts[window:] - counts[:-window]) == window
+        total = np.where(complete, sums[window:] - sums[:-window], np.nan)
+        total_squares = np.where(complete, squares[window:] - squares[:-window], np.nan)
+        return total, total_squares
+
+    def rolling_mean(self, window: int) -> np.ndarray:
+        def compute():
+            if self.n < window:
+                return np.full(self.n, np.nan)
+            total, _ = self._window_sums(window)
+            return _with_warmup(total / window + self.origin, self.n, window - 1)
+        return self._memoized(('mean', window), compute)
+
+    def rolling_std(self, window: int) -> np.ndarray:
+        def compute():
+            if self.n < window:
+                return np.full(self.n, np.nan)
+            total, total_squares = self._window_sums(window)
+            mean = total / window
+            variance = total_squares / window - mean * mean
+            return _with_warmup(np.sqrt(np.maximum(variance, 0.0)), self.n, window - 1)
+        return self._memoized(('std', window), compute)
+
+    def ema(self, span: int, values: Optional[np.ndarray] = None, key: Hashable = 'close') -> np.ndarray:
+        def compute():
+            source = self.close if values is None else values
+            return pd.Series(source).ewm(span=span, adjust=False).mean().to_numpy()
+        return self._memoized(('ema', key, span), compute)
+
+    def close_diff(self) -> np.ndarray:
+        return self._memoized('diff', lambda: np.diff(self.close))
+
+    def true_range(self) -> np.ndarray:
+        def compute():
+            tr = self.high - self.low
+            if self.n > 1:
+                previous_close = self.close[:-1]
+                tr[1:] = np.maximum.reduce([
+                    tr[1:],
+                    np.abs(self.high[1:] - previous_close),
+                    np.abs(self.low[1:] - previous_close),
+                ])
+            return tr
+        return self._memoized('true_range', compute)
+
+
+def _compute_one(workspace: _Workspace, kind: str, params: tuple) -> Dict[str, np.ndarray]:
+    if kind == 'SMA':
+        window, = params
+        return {f"SMA {window}": workspace.rolling_mean(window)}
+
+    if kind == 'EMA':
+        span, = params
+        return {f"EMA {span}": workspace.ema(span)}
+
+    if kind == 'BB':
+        window, width = params
+        middle = workspace.rolling_mean(window)
+        spread = width * workspace.rolling_std(window)
+        return {
+            f"BB {window} Upper": middle + spread,
+            f"BB {window} Middle": middle,
+            f"BB {window} Lower": middle - spread,
+        }
+
+    if kind == 'RSI':
+        window, = params
+        rsi = np.full(workspace.n, np.nan)
+        if workspace.n > window:
+            diff = workspace.close_diff()
+            gains = np.concatenate(([0.0], np.clip(diff, 0, None)))
+            losses = np.concatenate(([0.0], np.clip(-diff, 0, None)))
+            avg_gain = _wilder(gains, window, window)
+            avg_loss = _wilder(losses, window, window)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+            rsi[:window] = np.nan
+        return {f"RSI {window}": rsi}
+
+    if kind == 'MACD':
+        fast, slow, signal_span = params
+        macd = workspace.ema(fast) - workspace.ema(slow)
+        signal = workspace.ema(signal_span, values=macd, key=('macd', fast, slow))
+        return {'MACD': macd, 'MACD Signal': signal, 'MACD Histogram': macd - signal}
+
+    if kind == 'ATR':
+        window, = params
+        return {f"ATR {window}": _wilder(workspace.true_range(), window, window - 1)}
+
+    if kind == 'VWAP':
+        typical = (workspace.high + workspace.low + workspace.close) / 3
+        weighted = np.cumsum(typical * workspace.volume)
+        volume = np.cumsum(workspace.volume)
+        days = workspace.index.normalize() if hasattr(workspace.index, 'normalize') else None
+        if days is not None and workspace.n and len(days.unique()) < workspace.n:
+            # Intraday bars: anchor VWAP at each session's first bar
+            session_start = np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1])))
+            session = np.repeat(session_start, np.diff(np.append(session_start, workspace.n)))
+            weighted_before = np.concatenate(([0.0], weighted))[session]
+            volume_before = np.concatenate(([0.0], volume))[session]
+            weighted = weighted - weighted_before
+            volume = volume - volume_before
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {'VWAP': np.where(volume > 0, weighted / volume, np.nan)}
+
+    raise ValueError(f"Unknown indicator '{kind}'")
+
+
+def compute_indicators(data: pd.DataFrame, specs: Sequence[str],
+                       key: Optional[Hashable] = None) -> Dict[str, Dict[str, np.ndarray]]:
+    """Compute every requested indicator in shared passes over the frame.
+
+    Returns {spec: {line name: values aligned to data.index}}. When key is
+    given (e.g. (ticker, period)) results are memoized until new bars arrive.
+    """
+    specs = list(dict.fromkeys(specs))
+    memo_key = None
+    if key is not None and len(data):
+        # New or revised bars change the fingerprint and invalidate the entry. The sum of every
+        # close catches a split or dividend re-adjustment rewriting the earlier bars
+        close = data['Close'].to_numpy(dtype=np.float64)
+        memo_key = (key, tuple(specs), len(data), data.index[0], data.index[-1],
+                    float(close[-1]), float(np.nansum(close)))
+        with _results_lock:
+            if memo_key in _results:
+                _results.move_to_end(memo_key)
+                return _results[memo_key]
+
+    workspace = _Workspace(data)
+    results = {}
+    for spec in specs:
+        kind, params = parse_spec(spec)
+        results[spec] = _compute_one(workspace, kind, params)
+
+    if memo_key is not None:
+        with _results_lock:
+            _results[memo_key] = results
+            while len(_results) > MAX_MEMOIZED_RESULTS:
+                _results.popitem(last=False)
+    return results
+
+
+def available_indicators() -> List[str]:
+    """Get the indicator specs offered in the dashboard"""
+    return ['SMA:20', 'SMA:50', 'SMA:200', 'EMA:20', 'EMA:50', 'BB:20:2', 'VWAP',
+            'RSI:14', 'MACD:12:26:9', 'ATR:14']
@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Sequence
+
+import bcrypt
+
+# Same cost streamlit-authenticator uses, so hashes stay interchangeable
+BCRYPT_ROUNDS = 12
+# Worker processes doing bcrypt work; each hash keeps one core busy for ~250ms
+HASH_WORKERS = max(1, min(4, os.cpu_count() or 1))
+# Hash requests allowed in flight before further callers wait their turn
+MAX_PENDING = HASH_WORKERS * 4
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_PENDING)
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _verify(password: str, hashed: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    except ValueError:
+        return False  # not a bcrypt hash
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Get the shared hashing pool, starting its worker processes on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn avoids forking Streamlit's threads into the workers
+            _pool = ProcessPoolExecutor(
+                max_workers=HASH_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+
+def _run(fn, *args, timeout: Optional[float] = None):
+    """Run fn in the pool, capping bcrypt work at HASH_WORKERS cores outside the server process"""
+    with _slots:
+        try:
+            return get_pool().submit(fn, *args).result(timeout)
+        except BrokenProcessPool as e:
+            print(f"Password hashing pool failed, hashing inline: {e}")
+            _reset_pool()
+            return fn(*args)
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS, timeout: Optional[float] = None) -> str:
+    """Hash a password with bcrypt in a worker process"""
+    return _run(_hash, password, rounds, timeout=timeout)
+
+
+def verify_password(password: str, hashed: str, timeout: Optional[float] = None) -> bool:
+    """Check a password against a bcrypt hash in a worker process"""
+    return _run(_verify, password, hashed, timeout=timeout)
+
+
+def hash_passwords(passwords: Sequence[str], rounds: int = BCRYPT_ROUNDS) -> List[str]:
+    """Hash many passwords in parallel across the pool, keeping their order"""
+    if not passwords:
+        return []
+    chunksize = max(1, len(passwords) // (HASH_WORKERS * 8))
+    try:
+        return list(get_pool().map(_hash, passwords, [rounds] * len(passwords), chunksize=chunksize))
+    except BrokenProcessPool as e:
+        print(f"Password hashing pool failed, hashing inline: {e}")
+        _reset_pool()
+        return [_hash(password, rounds) for password in passwords]
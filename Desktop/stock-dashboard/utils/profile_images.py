@@ -0,0 +1,132 @@
+import hashlib
+import io
+import os
+import re
+import uuid
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+PROFILE_PIC_DIR = "profile_pics"
+
+# Square sizes generated at upload time, and the one the profile page shows
+THUMBNAIL_SIZES = (64, 150, 300)
+DISPLAY_SIZE = 150
+THUMBNAIL_FORMATS = ('webp', 'png')
+
+ALLOWED_FORMATS = {'PNG', 'JPEG', 'WEBP'}
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_PIXELS = 40_000_000
+
+_THUMBNAIL_NAME = re.compile(r'^(?P<base>.+)-(?P<size>\d+)\.(?P<ext>webp|png)$')
+
+
+class InvalidImageError(ValueError):
+    """Raised when an upload is not an acceptable image"""
+
+
+def _user_dir(username: str) -> str:
+    return os.path.join(PROFILE_PIC_DIR, re.sub(r'[^A-Za-z0-9_]', '_', username))
+
+
+def _write_atomic(path: str, data: bytes):
+    # A unique name keeps two sessions saving the same picture from sharing a temp file
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _open_image(data: bytes) -> 'Image.Image':
+    """Decode and check an upload, returning an upright RGB(A) image without metadata"""
+    # Pillow is only needed when a picture is uploaded, not to show thumbnails
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise InvalidImageError(f"Image is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    try:
+        with Image.open(io.BytesIO(data)) as probe:
+            if probe.format not in ALLOWED_FORMATS:
+                raise InvalidImageError("Only PNG, JPEG and WebP images are supported")
+            if probe.width * probe.height > MAX_PIXELS:
+                raise InvalidImageError("Image dimensions are too large")
+            probe.verify()
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise InvalidImageError(f"Could not read image: {e}")
+
+    # Phone photos are often stored sideways with an EXIF rotation flag
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    mode = 'RGBA' if has_alpha else 'RGB'
+    # Copying the pixels into a new image drops EXIF, GPS and other metadata
+    clean = Image.new(mode, image.size)
+    clean.paste(image.convert(mode))
+    return clean
+
+
+def save_profile_picture(username: str, data: bytes) -> str:
+    """Validate an upload, write its thumbnails and return the path to store for the user"""
+    from PIL import Image, ImageOps
+
+    image = _open_image(data)
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    user_dir = _user_dir(username)
+    os.makedirs(user_dir, exist_ok=True)
+    base = os.path.join(user_dir, digest)
+
+    square = ImageOps.fit(image, (max(THUMBNAIL_SIZES),) * 2, method=Image.LANCZOS)
+    for size in THUMBNAIL_SIZES:
+        thumbnail = square if size == square.width else square.resize((size, size), Image.LANCZOS)
+        for fmt in THUMBNAIL_FORMATS:
+            path = f"{base}-{size}.{fmt}"
+            if os.path.exists(path):
+                continue  # the same upload was processed before
+            buffer = io.BytesIO()
+            if fmt == 'webp':
+                thumbnail.save(buffer, 'WEBP', quality=85, method=4)
+            else:
+                thumbnail.save(buffer, 'PNG', optimize=True)
+            _write_atomic(path, buffer.getvalue())
+
+    _remove_other_pictures(user_dir, digest)
+    return f"{base}-{DISPLAY_SIZE}.webp"
+
+
+def _remove_other_pictures(user_dir: str, keep_digest: str):
+    for name in os.listdir(user_dir):
+        if not name.startswith(keep_digest):
+            try:
+                os.remove(os.path.join(user_dir, name))
+            except OSError as e:
+                print(f"Error removing old profile picture {name}: {e}")
+
+
+def get_thumbnail(profile_pic: Optional[str], size: int = DISPLAY_SIZE, fmt: str = 'webp') -> Optional[str]:
+    """Get the path of a stored picture's thumbnail at another size or format, if it exists"""
+    if not profile_pic:
+        return None
+    match = _THUMBNAIL_NAME.match(profile_pic)
+    if match is None:
+        return None
+    path = f"{match.group('base')}-{size}.{fmt}"
+    return path if os.path.exists(path) else None
+
+
+def upgrade_legacy_picture(username: str, profile_pic: Optional[str]) -> Optional[str]:
+    """Build thumbnails for a picture saved before thumbnails existed; returns the new path or None"""
+    if not profile_pic or _THUMBNAIL_NAME.match(profile_pic) or not os.path.exists(profile_pic):
+        return None
+    try:
+        with open(profile_pic, 'rb') as file:
+            return save_profile_picture(username, file.read())
+    except InvalidImageError as e:
+        print(f"Error converting profile picture {profile_pic}: {e}")
+        return None
@@ -1,42 +1,284 @@
+import argparse
+import atexit
+import glob
 import json
 import os
-from typing import List
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
 
+PREFERENCES_DB = "preferences.db"
+
+# Legacy per-user JSON files, imported once into the database
 FAVOURITES_DIR = "user_favourites"
+SETTINGS_DIR = "user_settings"
 
-def ensure_favourites_dir():
-    """Create favourites directory if it doesn't exist"""
-    if not os.path.exists(FAVOURITES_DIR):
-        os.makedirs(FAVOURITES_DIR)
+FAVOURITES_KEY = "favourites"
+SETTINGS_KEY = "settings"
 
-def get_user_favourites_path(username: str) -> str:
-    """Get the path to user's favourites file"""
-    return os.path.join(FAVOURITES_DIR, f"{username}_favourites.json")
+DEFAULT_SETTINGS = {
+    'theme_preference': 'Light',
+    'default_period': '1 Month',
+    'default_chart': 'Line Chart',
+    'show_ma_default': False
+}
 
-def load_user_favourites(username: str) -> List[str]:
-    """Load user favourite stocks from file"""
-    ensure_favourites_dir()
-    favourites_path = get_user_favourites_path(username)
-    
-    if os.path.exists(favourites_path):
+# Seconds a write waits for further writes before they are stored in one batch
+WRITE_DELAY = 2.0
+# Users whose preferences are kept in memory; the least recently used are dropped beyond this
+MAX_CACHED_USERS = 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS preferences (
+    username TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (username, key)
+);
+CREATE INDEX IF NOT EXISTS preferences_key ON preferences (key);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()
+
+# Read-through LRU cache of recently used users: {username: {key: value}}
+_cache: "OrderedDict[str, dict]" = OrderedDict()
+# Database revision the cache was read at; any process's flush bumps it
+_cache_revision = None
+# Writes waiting for the next flush: {(username, key): value}
+_pending: Dict[tuple, object] = {}
+_lock = threading.RLock()
+# Held for a whole flush, so batches are committed in the order they were taken
+_flush_lock = threading.Lock()
+_flush_timer = None
+
+
+def get_connection() -> sqlite3.Connection:
+    """Get this thread's connection to the preferences database, migrating JSON files on first use"""
+    path = os.path.abspath(PREFERENCES_DB)
+    connection = getattr(_local, 'connection', None)
+    if connection is None or getattr(_local, 'path', None) != path:
+        connection = sqlite3.connect(path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        _local.connection = connection
+        _local.path = path
+    with _init_lock:
+        if path not in _initialized:
+            connection.executescript(SCHEMA)
+            if not connection.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+                count = _migrate(connection, FAVOURITES_DIR, SETTINGS_DIR)
+                if count:
+                    print(f"Migrated {count} preference files into {PREFERENCES_DB}")
+            _initialized.add(path)
+    return connection
+
+
+def _read_json(path: str):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Skipping {path}: {e}")
+        return None
+
+
+def _migrate(connection: sqlite3.Connection, favourites_dir: str, settings_dir: str) -> int:
+    """Copy legacy JSON favourites and settings in, keeping values already in the database"""
+    rows = []
+    for path in glob.glob(os.path.join(favourites_dir, "*_favourites.json")):
+        favourites = _read_json(path)
+        if isinstance(favourites, list):
+            username = os.path.basename(path)[:-len("_favourites.json")]
+            rows.append((username, FAVOURITES_KEY, json.dumps(favourites), time.time()))
+    for path in glob.glob(os.path.join(settings_dir, "*_settings.json")):
+        settings = _read_json(path)
+        if isinstance(settings, dict):
+            username = os.path.basename(path)[:-len("_settings.json")]
+            rows.append((username, SETTINGS_KEY, json.dumps(settings), time.time()))
+    with connection:
+        connection.executemany(
+            "INSERT OR IGNORE INTO preferences (username, key, value, updated_at) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', ?)", (str(time.time()),)
+        )
+        _bump_revision(connection)
+    return len(rows)
+
+
+def _bump_revision(connection: sqlite3.Connection):
+    # Tells every process's preferences cache that stored values changed
+    connection.execute(
+        "INSERT INTO meta (key, value) VALUES ('revision', '1') "
+        "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+    )
+
+
+def _revision(connection: sqlite3.Connection) -> Optional[str]:
+    row = connection.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+    return row[0] if row else None
+
+
+def migrate_json_files(favourites_dir: str = FAVOURITES_DIR, settings_dir: str = SETTINGS_DIR) -> int:
+    """Import legacy JSON preference files; returns the number of files read"""
+    count = _migrate(get_connection(), favourites_dir, settings_dir)
+    with _lock:
+        _cache.clear()
+    return count
+
+
+def _load_user(username: str) -> dict:
+    """Get a user's cached preferences, reading them from the database on first access or after another write"""
+    global _cache_revision
+    connection = get_connection()
+    revision = _revision(connection)
+    with _lock:
+        if revision != _cache_revision:
+            # Another process (or a flush) stored new values since the cache was filled
+            _cache.clear()
+            _cache_revision = revision
+        if username in _cache:
+            _cache.move_to_end(username)
+            return _cache[username]
+    rows = connection.execute(
+        "SELECT key, value FROM preferences WHERE username = ?", (username,)
+    ).fetchall()
+    values = {key: json.loads(value) for key, value in rows}
+    with _lock:
+        # Writes not flushed yet win over what is stored
+        for (pending_user, key), value in _pending.items():
+            if pending_user == username:
+                values[key] = value
+        if username in _cache:
+            return _cache[username]
+        if revision == _cache_revision:
+            _cache[username] = values
+            while len(_cache) > MAX_CACHED_USERS:
+                _cache.popitem(last=False)
+        return values
+
+
+def get_preference(username: str, key: str, default=None):
+    """Get one preference value, served from memory after the first read"""
+    return _load_user(username).get(key, default)
+
+
+def set_preference(username: str, key: str, value):
+    """Set a preference; it is visible immediately and stored with the next batched flush"""
+    global _flush_timer
+    values = _load_user(username)
+    with _lock:
+        values[key] = value
+        _pending[(username, key)] = value
+        # Debounce: every write pushes the flush back so a burst is stored at once
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+        _flush_timer = threading.Timer(WRITE_DELAY, flush_preferences)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+
+def flush_preferences() -> int:
+    """Write every pending preference in one transaction; returns the number written"""
+    with _flush_lock:
+        with _lock:
+            if not _pending:
+                return 0
+            batch = list(_pending.items())
+            _pending.clear()
+        now = time.time()
         try:
-            with open(favourites_path, 'r') as f:
-                favourites = json.load(f)
-                return favourites if isinstance(favourites, list) else []
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
-    
-    return []
+            connection = get_connection()
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO preferences (username, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                    [(username, key, json.dumps(value), now) for (username, key), value in batch]
+                )
+                _bump_revision(connection)
+        except sqlite3.Error as e:
+            print(f"Error saving preferences: {e}")
+            with _lock:
+                # Values set since the batch was taken are newer and stay
+                for entry, value in batch:
+                    _pending.setdefault(entry, value)
+            return 0
+        return len(batch)
+
+
+atexit.register(flush_preferences)
+
+
+def load_user_favourites(username: str) -> List[str]:
+    """Load user favourite stocks"""
+    favourites = get_preference(username, FAVOURITES_KEY, [])
+    return list(favourites) if isinstance(favourites, list) else []
 
 def save_user_favourites(username: str, favourites: List[str]) -> bool:
-    """Save user favourite stocks to file"""
-    ensure_favourites_dir()
-    favourites_path = get_user_favourites_path(username)
-    
+    """Save user favourite stocks"""
     try:
-        with open(favourites_path, 'w') as f:
-            json.dump(favourites, f, indent=2)
+        set_preference(username, FAVOURITES_KEY, list(favourites))
         return True
     except Exception as e:
         print(f"Error saving favourites: {e}")
         return False
+
+def load_user_settings(username: str) -> dict:
+    """Load user settings, filled in with defaults"""
+    settings = get_preference(username, SETTINGS_KEY, {})
+    return {**DEFAULT_SETTINGS, **(settings if isinstance(settings, dict) else {})}
+
+def save_user_settings(username: str, settings: dict) -> bool:
+    """Save user settings"""
+    try:
+        set_preference(username, SETTINGS_KEY, dict(settings))
+        return True
+    except Exception as e:
+        print(f"Error saving settings: {e}")
+        return False
+
+def load_all_favourites() -> Dict[str, List[str]]:
+    """Get every user's favourites in one query, e.g. for prefetching or analytics"""
+    flush_preferences()
+    rows = get_connection().execute(
+        "SELECT username, value FROM preferences WHERE key = ?", (FAVOURITES_KEY,)
+    ).fetchall()
+    return {username: json.loads(value) for username, value in rows}
+
+def favourite_counts() -> Dict[str, int]:
+    """Count how many users have each ticker as a favourite"""
+    counts = {}
+    for favourites in load_all_favourites().values():
+        for ticker in favourites:
+            counts[ticker] = counts.get(ticker, 0) + 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage stored user preferences")
+    commands = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = commands.add_parser('migrate', help="Import legacy JSON favourites and settings")
+    migrate_parser.add_argument('--favourites-dir', default=FAVOURITES_DIR)
+    migrate_parser.add_argument('--settings-dir', default=SETTINGS_DIR)
+    commands.add_parser('popular', help="List the most common favourites")
+
+    args = parser.parse_args()
+    if args.command == 'migrate':
+        print(f"Imported {migrate_json_files(args.favourites_dir, args.settings_dir)} files")
+    elif args.command == 'popular':
+        counts = favourite_counts()
+        for ticker in sorted(counts, key=counts.get, reverse=True)[:20]:
+            print(f"{ticker:<15} {counts[ticker]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+
+# Set STARTUP_PROFILE=1 to report import and first-render timings for each page
+ENABLED = os.environ.get('STARTUP_PROFILE', '').lower() in ('1', 'true', 'yes')
+# Optional JSON-lines file the reports are appended to
+REPORT_FILE = os.environ.get('STARTUP_PROFILE_FILE')
+
+# Modules each page imports, for measuring cold import cost outside Streamlit
+PAGE_MODULES = {
+    'main': ['streamlit', 'utils.authenticator', 'services.prefetch', 'utils.user_store'],
+    'register': ['streamlit', 'utils.password_hashing', 'utils.user_store'],
+    'profile': ['streamlit', 'utils.password_hashing', 'utils.profile_images',
+                'utils.settings_manager', 'utils.user_store'],
+    'dashboard': ['streamlit', 'services.stock_data', 'utils.charts', 'utils.indicators',
+                  'utils.settings_manager', 'utils.user_store'],
+    'metrics': ['streamlit', 'pandas', 'services.metrics', 'services.stock_data', 'utils.user_store'],
+}
+
+# Libraries worth keeping off the login path; reported when a page pulls them in
+HEAVY_MODULES = ('yfinance', 'plotly', 'requests', 'yaml', 'PIL', 'streamlit_authenticator', 'pyarrow')
+
+_process_start = time.perf_counter()
+_lock = threading.Lock()
+_pages: Dict[str, dict] = {}
+_rendered = set()
+_import_times: Dict[str, float] = {}
+
+
+class _ImportTimer:
+    """Meta path finder that times the first load of each top-level package"""
+
+    def find_spec(self, fullname, path=None, target=None):
+        if '.' in fullname or fullname in _import_times:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+
+class _TimedLoader:
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # The module only ever sees its real loader
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            # Inclusive of the package's own imports
+            _import_times.setdefault(module.__name__, time.perf_counter() - start)
+
+
+if ENABLED and not any(isinstance(finder, _ImportTimer) for finder in sys.meta_path):
+    sys.meta_path.insert(0, _ImportTimer())
+
+
+def page_start(page: str):
+    """Mark the start of a page script, before its imports"""
+    if not ENABLED or page in _rendered:
+        return
+    with _lock:
+        _pages[page] = {
+            'start': time.perf_counter(),
+            'modules_before': set(sys.modules),
+        }
+
+
+def imports_done(page: str):
+    """Mark the end of a page's imports"""
+    if not ENABLED or page not in _pages or page in _rendered:
+        return
+    with _lock:
+        _pages[page]['imports_done'] = time.perf_counter()
+
+
+def page_rendered(page: str):
+    """Mark the end of a page's first complete run and report its timings"""
+    if not ENABLED or page not in _pages or page in _rendered:
+        return
+    with _lock:
+        _rendered.add(page)
+        info = _pages.pop(page)
+    end = time.perf_counter()
+    imports_end = info.get('imports_done', info['start'])
+    new_modules = set(sys.modules) - info['modules_before']
+    heavy = {
+        name: round(_import_times.get(name, 0.0) * 1000, 1)
+        for name in HEAVY_MODULES if name in new_modules
+    }
+    report = {
+        'page': page,
+        'pid': os.getpid(),
+        'since_process_start_ms': round((end - _process_start) * 1000, 1),
+        'imports_ms': round((imports_end - info['start']) * 1000, 1),
+        'first_render_ms': round((end - info['start']) * 1000, 1),
+        'modules_loaded': len(new_modules),
+        'heavy_imports_ms': heavy,
+    }
+    _report(report)
+
+
+def _report(report: dict):
+    heavy = ', '.join(f"{name} {ms:.0f}ms" for name, ms in report['heavy_imports_ms'].items()) or 'none'
+    print(
+        f"[startup] {report['page']}: imports {report['imports_ms']:.0f}ms, "
+        f"first render {report['first_render_ms']:.0f}ms, "
+        f"{report['modules_loaded']} modules loaded (heavy: {heavy})"
+    )
+    if REPORT_FILE:
+        try:
+            with open(REPORT_FILE, 'a') as file:
+                file.write(json.dumps(report) + '\n')
+        except OSError as e:
+            print(f"Error writing startup profile: {e}")
+
+
+def measure_cold_imports(modules: List[str]) -> float:
+    """Import modules in a fresh interpreter and return the seconds it took"""
+    code = (
+        "import time, importlib; start = time.perf_counter(); "
+        f"[importlib.import_module(name) for name in {modules!r}]; "
+        "print(time.perf_counter() - start)"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "import failed")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of each page's modules")
+    parser.add_argument('--repeat', type=int, default=3, help="Fresh interpreters per page; the best run is shown")
+    args = parser.parse_args()
+
+    for page, modules in PAGE_MODULES.items():
+        try:
+            best = min(measure_cold_imports(modules) for _ in range(args.repeat))
+            print(f"{page:<10} {best * 1000:8.0f} ms")
+        except RuntimeError as e:
+            print(f"{page:<10} failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
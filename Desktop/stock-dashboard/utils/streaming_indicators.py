@@ -0,0 +1,390 @@
+import math
+from collections import deque
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.indicators import compute_indicators, parse_spec
+
+NAN = float('nan')
+
+
+def _ewm_alpha(span: Optional[float] = None, alpha: Optional[float] = None) -> float:
+    # Derived the same way pandas does, so the recursion matches ewm() bit for bit
+    com = (span - 1) / 2 if span is not None else (1 - alpha) / alpha
+    return 1.0 / (1.0 + com)
+
+
+class _EWM:
+    """pandas ewm(adjust=False).mean() recursion, one value at a time"""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.old_weight = 1.0 - alpha
+        self.value = None
+        self._previous = None
+
+    def _step(self, base, x):
+        if base is None:
+            return x
+        return ((self.old_weight * base) + (self.alpha * x)) / (self.old_weight + self.alpha)
+
+    def update(self, x: float) -> float:
+        self._previous = self.value
+        self.value = self._step(self.value, x)
+        return self.value
+
+    def revise(self, x: float) -> float:
+        self.value = self._step(self._previous, x)
+        return self.value
+
+
+class _PrefixWindow:
+    """Running prefix sums of (x - first x) and its square, keeping the last window + 1"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.origin = None
+        self.sums = deque([0.0], maxlen=window + 1)
+        self.squares = deque([0.0], maxlen=window + 1)
+        self.count = 0
+
+    def _push(self, x):
+        shifted = x - self.origin
+        self.sums.append(self.sums[-1] + shifted)
+        self.squares.append(self.squares[-1] + shifted * shifted)
+
+    def update(self, x: float):
+        if self.origin is None:
+            self.origin = x
+        self._push(x)
+        self.count += 1
+
+    def revise(self, x: float):
+        self.sums.pop()
+        self.squares.pop()
+        if self.count == 1:
+            self.origin = x
+        self._push(x)
+
+    def ready(self) -> bool:
+        return self.count >= self.window
+
+    def mean_shifted(self) -> float:
+        return (self.sums[-1] - self.sums[0]) / self.window
+
+    def variance(self) -> float:
+        mean = self.mean_shifted()
+        return (self.squares[-1] - self.squares[0]) / self.window - mean * mean
+
+
+class _WilderAverage:
+    """Wilder smoothing seeded with the simple mean of the first window values"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.seed_values = []
+        self.ewm = _EWM(_ewm_alpha(alpha=1 / window))
+
+    def update(self, x: float) -> float:
+        if self.ewm.value is None:
+            self.seed_values.append(x)
+            if len(self.seed_values) < self.window:
+                return NAN
+            return self.ewm.update(np.array(self.seed_values).mean())
+        return self.ewm.update(x)
+
+    def revise(self, x: float) -> float:
+        if self.ewm.value is None or self.ewm._previous is None:
+            # Still seeding, or the revised bar is the one that produced the seed
+            if self.ewm.value is not None:
+                self.ewm.value = None
+            self.seed_values[-1] = x
+            if len(self.seed_values) < self.window:
+                return NAN
+            return self.ewm.update(np.array(self.seed_values).mean())
+        return self.ewm.revise(x)
+
+
+class StreamingSMA:
+    """Simple moving average of closes, O(1) per bar"""
+
+    def __init__(self, window: int = 20):
+        self.window = window
+        self.names = [f"SMA {window}"]
+        self._prefix = _PrefixWindow(window)
+
+    def _value(self):
+        if not self._prefix.ready():
+            return {self.names[0]: NAN}
+        return {self.names[0]: self._prefix.mean_shifted() + self._prefix.origin}
+
+    def update(self, bar: dict) -> Dict[str, float]:
+        self._prefix.update(bar['Close'])
+        return self._value()
+
+    def revise(self, bar: dict) -> Dict[str, float]:
+        self._prefix.revise(bar['Close'])
+        return self._value()
+
+
+class StreamingBollinger:
+    """Bollinger Bands (population standard deviation), O(1) per bar"""
+
+    def __init__(self, window: int = 20, width: float = 2):
+        self.window = window
+        self.width = width
+        self.names = [f"BB {window} Upper", f"BB {window} Middle", f"BB {window} Lower"]
+        self._prefix = _PrefixWindow(window)
+
+    def _value(self):
+        if not self._prefix.ready():
+            return dict.fromkeys(self.names, NAN)
+        middle = self._prefix.mean_shifted() + self._prefix.origin
+        spread = self.width * math.sqrt(max(self._prefix.variance(), 0.0))
+        return dict(zip(self.names, (middle + spread, middle, middle - spread)))
+
+    def update(self, bar: dict) -> Dict[str, float]:
+        self._prefix.update(bar['Close'])
+        return self._value()
+
+    def revise(self, bar: dict) -> Dict[str, float]:
+        self._prefix.revise(bar['Close'])
+        return self._value()
+
+
+class StreamingEMA:
+    """Exponential moving average of closes (pandas adjust=False convention), O(1) per bar"""
+
+    def __init__(self, span: int = 20):
+        self.span = span
+        self.names = [f"EMA {span}"]
+        self._ewm = _EWM(_ewm_alpha(span=span))
+
+    def update(self, bar: dict) -> Dict[str, float]:
+        return {self.names[0]: self._ewm.update(bar['Close'])}
+
+    def revise(self, bar: dict) -> Dict[str, float]:
+        return {self.names[0]: self._ewm.revise(bar['Close'])}
+
+
+class StreamingMACD:
+    """MACD line, signal and histogram from three running EMAs, O(1) per bar"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.names = ['MACD', 'MACD Signal', 'MACD Histogram']
+        self._fast = _EWM(_ewm_alpha(span=fast))
+        self._slow = _EWM(_ewm_alpha(span=slow))
+        self._signal = _EWM(_ewm_alpha(span=signal))
+
+    def update(self, bar: dict) -> Dict[str, float]:
+        macd = self._fast.update(bar['Close']) - self._slow.update(bar['Close'])
+        signal = self._signal.update(macd)
+        return dict(zip(self.names, (macd, signal, macd - signal)))
+
+    def revise(self, bar: dict) -> Dict[str, float]:
+        macd = self._fast.revise(bar['Close']) - self._slow.revise(bar['Close'])
+        signal = self._signal.revise(macd)
+        return dict(zip(self.names, (macd, signal, macd - signal)))
+
+
+class StreamingRSI:
+    """Relative Strength Index with Wilder smoothing, O(1) per bar"""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.names = [f"RSI {window}"]
+        self._gains = _WilderAverage(window)
+        self._losses = _WilderAverage(window)
+        self._previous_close = None
+        self._last_close = None
+
+    def _value(self, avg_gain, avg_loss):
+        if math.isnan(avg_gain):
+            return {self.names[0]: NAN}
+        if avg_loss == 0:
+            return {self.names[0]: 100.0}
+        return {self.names[0]: 100 - 100 / (1 + avg_gain / avg_loss)}
+
+    def _apply(self, close, revise):
+        if self._previous_close is None:
+            return {self.names[0]: NAN}
+        diff = close - self._previous_close
+        step_gain = self._gains.revise if revise else self._gains.update
+        step_loss = self._losses.revise if revise else self._losses.update
+        return self._value(step_gain(max(diff, 0.0)), step_loss(max(-diff, 0.0)))
+
+    def update(self, bar: dict) -> Dict[str, float]:
+        self._previous_close = self._last_close
+        self._last_close = bar['Close']
+        return self._apply(bar['Close'], revise=False)
+
+    def revise(self, bar: dict) -> Dict[str, float]:
+        self._last_close = bar['Close']
+        return self._apply(bar['Close'], revise=True)
+
+
+class StreamingATR:
+    """Average True Range with Wilder smoothing, O(1) per bar"""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.names = [f"ATR {window}"]
+        self._average = _WilderAverage(window)
+        self._previous_close = None
+        self._last_close = None
+
+    def _true_range(self, bar):
+        true_range = bar['High'] - bar['Low']
+        if self._previous_close is not None:
+            true_range = max(
+                true_range,
+                abs(bar['High'] - self._previous_close),
+                abs(bar['Low'] - self._previous_close)
+            )
+        return true_range
+
+    def update(self, bar: dict) -> Dict[str, float]:
+        self._previous_close = self._last_close
+        self._last_close = bar['Close']
+        return {self.names[0]: self._average.update(self._true_range(bar))}
+
+    def revise(self, bar: dict) -> Dict[str, float]:
+        self._last_close = bar['Close']
+        return {self.names[0]: self._average.revise(self._true_range(bar))}
+
+
+class StreamingVWAP:
+    """Volume-weighted average price, optionally re-anchored at each session, O(1) per bar"""
+
+    def __init__(self, anchor_sessions: bool = False):
+        self.anchor_sessions = anchor_sessions
+        self.names = ['VWAP']
+        self._weighted = 0.0
+        self._volume = 0.0
+        self._session_base = (0.0, 0.0)
+        self._session_day = None
+        self._previous = None
+
+    def _apply(self, bar):
+        # Cumulative totals minus the session's opening totals, as the batch engine computes it
+        typical = (bar['High'] + bar['Low'] + bar['Close']) / 3
+        self._weighted += typical * bar['Volume']
+        self._volume += bar['Volume']
+        weighted = self._weighted - self._session_base[0]
+        volume = self._volume - self._session_base[1]
+        return {'VWAP': weighted / volume if volume > 0 else NAN}
+
+    def update(self, bar: dict) -> Dict[str, float]:
+        self._previous = (self._weighted, self._volume, self._session_base, self._session_day)
+        if self.anchor_sessions:
+            day = bar['Timestamp'].normalize()
+            if day != self._session_day:
+                self._session_base = (self._weighted, self._volume)
+                self._session_day = day
+        return self._apply(bar)
+
+    def revise(self, bar: dict) -> Dict[str, float]:
+        self._weighted, self._volume, self._session_base, self._session_day = self._previous
+        return self.update(bar)
+
+
+_STREAMING_CLASSES = {
+    'SMA': StreamingSMA,
+    'EMA': StreamingEMA,
+    'BB': StreamingBollinger,
+    'MACD': StreamingMACD,
+    'RSI': StreamingRSI,
+    'ATR': StreamingATR,
+}
+
+
+class IndicatorStream:
+    """A set of streaming indicators fed bar by bar, matching utils.indicators on the same bars"""
+
+    def __init__(self, specs: Sequence[str], anchor_sessions: bool = False):
+        self.specs = list(dict.fromkeys(specs))
+        self._indicators = {}
+        for spec in self.specs:
+            kind, params = parse_spec(spec)
+            if kind == 'VWAP':
+                self._indicators[spec] = StreamingVWAP(anchor_sessions)
+            else:
+                self._indicators[spec] = _STREAMING_CLASSES[kind](*params)
+        self.latest = {spec: {} for spec in self.specs}
+
+    def update(self, bar: dict) -> Dict[str, Dict[str, float]]:
+        """Feed a new bar ({'Timestamp', 'Open', 'High', 'Low', 'Close', 'Volume'})"""
+        for spec, indicator in self._indicators.items():
+            self.latest[spec] = indicator.update(bar)
+        return self.latest
+
+    def revise(self, bar: dict) -> Dict[str, Dict[str, float]]:
+        """Replace the newest bar, e.g. when a still-forming bar is updated"""
+        for spec, indicator in self._indicators.items():
+            self.latest[spec] = indicator.revise(bar)
+        return self.latest
+
+    @classmethod
+    def from_history(cls, data: pd.DataFrame, specs: Sequence[str]) -> 'IndicatorStream':
+        """Prime a stream by replaying existing bars once"""
+        stream = cls(specs, anchor_sessions=_is_intraday(data.index))
+        for bar in _bars(data):
+            stream.update(bar)
+        return stream
+
+
+def _is_intraday(index) -> bool:
+    return len(index) > 0 and hasattr(index, 'normalize') and len(index.normalize().unique()) < len(index)
+
+
+def _bars(data: pd.DataFrame):
+    columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+    for timestamp, values in zip(data.index, data[columns].to_numpy(dtype=np.float64)):
+        bar = dict(zip(columns, values.tolist()))
+        bar['Timestamp'] = timestamp
+        yield bar
+
+
+def verify_against_batch(data: pd.DataFrame, specs: Sequence[str]) -> Dict[str, float]:
+    """Stream every bar and compare with the batch engine; returns the max abs difference per line"""
+    batch = compute_indicators(data, specs)
+    stream = IndicatorStream(specs, anchor_sessions=_is_intraday(data.index))
+    streamed = {spec: {name: [] for name in batch[spec]} for spec in stream.specs}
+    for bar in _bars(data):
+        for spec, values in stream.update(bar).items():
+            for name, value in values.items():
+                streamed[spec][name].append(value)
+
+    differences = {}
+    for spec in stream.specs:
+        for name, expected in batch[spec].items():
+            actual = np.array(streamed[spec][name])
+            if not np.array_equal(np.isnan(actual), np.isnan(expected)):
+                differences[name] = float('inf')
+                continue
+            valid = ~np.isnan(expected)
+            differences[name] = float(np.max(np.abs(actual[valid] - expected[valid]), initial=0.0))
+    return differences
+
+
+def main():
+    from services.providers import SyntheticProvider, random_walk_frame
+
+    specs = ['SMA:20', 'SMA:50', 'EMA:20', 'BB:20:2', 'RSI:14', 'MACD:12:26:9', 'ATR:14', 'VWAP']
+    samples = {
+        'daily': random_walk_frame(5000, seed=7),
+        'intraday': SyntheticProvider().history('CHECK', period='5d', interval='5m'),
+    }
+    failed = False
+    for label, data in samples.items():
+        for name, difference in verify_against_batch(data, specs).items():
+            status = "ok" if difference == 0.0 else "MISMATCH"
+            failed = failed or difference != 0.0
+            print(f"{label:<9} {name:<16} max |stream - batch| = {difference:.3e}  {status}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
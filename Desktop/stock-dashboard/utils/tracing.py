@@ -0,0 +1,289 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional
+
+# Set RERUN_TRACE=1 to time each stage of every script rerun and show a debug panel
+ENABLED = os.environ.get('RERUN_TRACE', '').lower() in ('1', 'true', 'yes')
+# JSON-lines trace file, rotated at TRACE_MAX_BYTES with TRACE_BACKUPS old files kept
+TRACE_FILE = os.environ.get('RERUN_TRACE_FILE', 'reruns.trace.jsonl')
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_BACKUPS = 3
+# Reruns kept in memory per session for the debug panel
+TRACE_KEEP = 20
+
+# Session state key holding this module's per-session state; underscored keys are never triggers
+STATE_KEY = '_rerun_trace'
+
+_current = contextvars.ContextVar('rerun_trace', default=None)
+_NULL_SPAN = nullcontext()
+_logger = None
+_logger_lock = threading.Lock()
+_MISSING = object()
+
+
+def _get_logger() -> logging.Logger:
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            logger = logging.getLogger('stock_dashboard.rerun_trace')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(TRACE_FILE, maxBytes=TRACE_MAX_BYTES,
+                                          backupCount=TRACE_BACKUPS, delay=True)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            _logger = logger
+        return _logger
+
+
+def _session_id() -> str:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else 'none'
+
+
+def _snapshot(state) -> dict:
+    """Copy the comparable values in session state, e.g. keyed widget values"""
+    snapshot = {}
+    for key in list(state.keys()):
+        if not isinstance(key, str) or key.startswith('_'):
+            continue
+        value = state[key]
+        if isinstance(value, (list, tuple)):
+            value = tuple(value)
+            if not all(isinstance(item, (str, int, float, bool, type(None))) for item in value):
+                continue
+        elif not isinstance(value, (str, int, float, bool, type(None), date, datetime)):
+            continue
+        snapshot[key] = value
+    return snapshot
+
+
+def infer_trigger(before: Optional[dict], after: dict, last_trigger: List[str]) -> List[str]:
+    """Get the session state keys changed between the end of the last rerun and the start of this one"""
+    if before is None:
+        return ['initial load']
+    changed = []
+    for key in sorted(set(before) | set(after)):
+        old, new = before.get(key, _MISSING), after.get(key, _MISSING)
+        if old == new:
+            continue
+        if old is True and new is False and key in last_trigger:
+            continue  # a button clicked last rerun springing back
+        changed.append(key)
+    return changed
+
+
+def start_rerun(page: str):
+    """Begin the trace of a page's script run; call before the page does any work"""
+    if not ENABLED:
+        return
+    import streamlit as st
+
+    state = st.session_state.get(STATE_KEY)
+    if state is None:
+        state = st.session_state[STATE_KEY] = {
+            'page': None, 'snapshot': None, 'trigger': [], 'history': deque(maxlen=TRACE_KEEP), 'current': None
+        }
+    if state['current'] is not None:
+        # The last run ended early, e.g. by st.stop(), st.rerun() or switch_page
+        _finish(state, state['current'], interrupted=True)
+
+    if state['page'] not in (None, page):
+        trigger = [f"navigation from {state['page']}"]
+    else:
+        trigger = infer_trigger(state['snapshot'], _snapshot(st.session_state), state['trigger'])
+    trace = {
+        'trace_id': uuid.uuid4().hex[:12],
+        'session': _session_id(),
+        'page': page,
+        'trigger': trigger,
+        'started_at': datetime.now().isoformat(timespec='milliseconds'),
+        'start': time.perf_counter(),
+        'spans': [],
+        'stack': [],
+    }
+    state.update(page=page, trigger=trigger, current=trace)
+    _current.set(trace)
+
+
+def _open(trace: dict, name: str, attrs: dict) -> int:
+    index = len(trace['spans'])
+    trace['spans'].append(dict(
+        attrs,
+        name=name,
+        depth=len(trace['stack']),
+        parent=trace['stack'][-1] if trace['stack'] else None,
+        start_ms=round((time.perf_counter() - trace['start']) * 1000, 2),
+        duration_ms=None
+    ))
+    trace['stack'].append(index)
+    trace['last_ms'] = trace['spans'][index]['start_ms']
+    return index
+
+
+def _close(trace: dict, index: int, end_ms: Optional[float] = None):
+    span = trace['spans'][index]
+    if span['duration_ms'] is not None:
+        return  # already closed by a later stage()
+    if end_ms is None:
+        end_ms = (time.perf_counter() - trace['start']) * 1000
+    span['duration_ms'] = round(max(0.0, end_ms - span['start_ms']), 2)
+    trace['last_ms'] = end_ms
+    if index in trace['stack']:
+        del trace['stack'][trace['stack'].index(index):]
+
+
+@contextmanager
+def _span(trace: dict, name: str, attrs: dict):
+    index = _open(trace, name, attrs)
+    try:
+        yield
+    finally:
+        _close(trace, index)
+
+
+def span(name: str, **attrs):
+    """Time a block as a span nested inside the current stage or span"""
+    trace = _current.get() if ENABLED else None
+    if trace is None:
+        return _NULL_SPAN
+    return _span(trace, name, attrs)
+
+
+def stage(name: str):
+    """End the current top-level stage and start the next one; later spans nest inside it"""
+    trace = _current.get() if ENABLED else None
+    if trace is None:
+        return
+    while trace['stack']:
+        _close(trace, trace['stack'][0])
+    _open(trace, name, {})
+
+
+def end_rerun():
+    """Finish the current trace, write it to the trace file and keep it for the debug panel"""
+    trace = _current.get() if ENABLED else None
+    if trace is None:
+        return
+    import streamlit as st
+
+    state = st.session_state.get(STATE_KEY)
+    if state is None or state['current'] is not trace:
+        return
+    _finish(state, trace, interrupted=False)
+    # Compared with the next run's state to find the widget that triggered it
+    state['snapshot'] = _snapshot(st.session_state)
+
+
+def _finish(state: dict, trace: dict, interrupted: bool):
+    # An interrupted run is only known to have lasted until its last span event
+    end_ms = trace.get('last_ms', 0.0) if interrupted else (time.perf_counter() - trace['start']) * 1000
+    while trace['stack']:
+        _close(trace, trace['stack'][0], end_ms)
+    record = {
+        'trace_id': trace['trace_id'],
+        'session': trace['session'],
+        'page': trace['page'],
+        'trigger': trace['trigger'],
+        'started_at': trace['started_at'],
+        'total_ms': round(end_ms, 2),
+        'interrupted': interrupted,
+        'spans': trace['spans'],
+    }
+    state['current'] = None
+    state['history'].append(record)
+    _current.set(None)
+    try:
+        _get_logger().info(json.dumps(record, default=str))
+    except OSError as e:
+        print(f"Error writing rerun trace: {e}")
+
+
+def recent_traces(limit: int = TRACE_KEEP) -> List[dict]:
+    """Get this session's most recent finished traces, oldest first"""
+    import streamlit as st
+
+    state = st.session_state.get(STATE_KEY)
+    if state is None:
+        return []
+    return list(state['history'])[-limit:]
+
+
+def _slowest(trace: dict) -> str:
+    """Get the name of the longest nested span, or stage if nothing is nested"""
+    spans = [s for s in trace['spans'] if s['depth'] > 0] or trace['spans']
+    return max(spans, key=lambda s: s['duration_ms'])['name'] if spans else ''
+
+
+def render_panel(limit: int = 10):
+    """Show a debug expander with the stage breakdown and waterfall of the last reruns"""
+    if not ENABLED:
+        return
+    import plotly.graph_objects as go
+    import streamlit as st
+
+    traces = recent_traces(limit)
+    if not traces:
+        return
+
+    with st.expander(f"Rerun traces (last {len(traces)})"):
+        labels = [f"#{i + 1} {trace['started_at'][11:19]}" for i, trace in enumerate(traces)]
+        st.dataframe(
+            [
+                {
+                    'Rerun': label,
+                    'Trigger': ', '.join(trace['trigger']) or 'unknown',
+                    'Total ms': trace['total_ms'],
+                    'Slowest span': _slowest(trace),
+                    'Interrupted': trace['interrupted'],
+                }
+                for label, trace in zip(labels, traces)
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+
+        # Time per top-level stage, one bar per rerun
+        stages = list(dict.fromkeys(s['name'] for trace in traces for s in trace['spans'] if s['depth'] == 0))
+        stacked = go.Figure()
+        for name in stages:
+            stacked.add_trace(go.Bar(
+                y=labels,
+                x=[sum(s['duration_ms'] for s in trace['spans'] if s['depth'] == 0 and s['name'] == name)
+                   for trace in traces],
+                name=name,
+                orientation='h'
+            ))
+        stacked.update_layout(barmode='stack', height=120 + 28 * len(traces), xaxis_title='ms',
+                              margin=dict(l=10, r=10, t=30, b=10), title='Stages per rerun')
+        st.plotly_chart(stacked, use_container_width=True)
+
+        # Waterfall of every span in one rerun
+        choice = st.selectbox("Rerun", labels[::-1], key='_rerun_trace_selected')
+        trace = traces[labels.index(choice)]
+        spans = trace['spans']
+        names = [f"{'  ' * s['depth']}{s['name']} ({i})" for i, s in enumerate(spans)]
+        waterfall = go.Figure(go.Bar(
+            y=names,
+            x=[s['duration_ms'] for s in spans],
+            base=[s['start_ms'] for s in spans],
+            orientation='h',
+            marker_color=['#1f77b4' if s['depth'] == 0 else '#ff7f0e' for s in spans],
+            hovertext=[f"{s['name']}: {s['duration_ms']:.1f} ms from {s['start_ms']:.1f} ms" for s in spans],
+            hoverinfo='text'
+        ))
+        waterfall.update_layout(height=120 + 24 * len(spans), xaxis_title='ms since rerun start',
+                                yaxis=dict(autorange='reversed'), margin=dict(l=10, r=10, t=30, b=10),
+                                title=f"Trigger: {', '.join(trace['trigger']) or 'unknown'}")
+        st.plotly_chart(waterfall, use_container_width=True)
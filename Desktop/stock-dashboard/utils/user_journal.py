@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SNAPSHOT_FILE = "config.yaml"
+JOURNAL_FILE = "users.journal"
+
+# Seconds between background compactions, and journal size that triggers one early
+COMPACT_INTERVAL = 60
+COMPACT_BYTES = 256 * 1024
+# fsync each appended entry so an acknowledged registration survives a crash
+JOURNAL_FSYNC = True
+
+_compactor = None
+_compactor_lock = threading.Lock()
+_compact_now = threading.Event()
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Hold an exclusive lock on path's sidecar .lock file, across threads and processes"""
+    with open(f"{path}.lock", 'a+b') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def record(op: str, username: str = None, **fields):
+    """Append a user mutation ('register', 'change-password', 'set-profile-pic', 'update', 'set-cookie')"""
+    record_many([(op, username, fields)])
+
+
+def record_many(mutations: List[Tuple[str, Optional[str], dict]]):
+    """Append several (op, username, fields) mutations with one lock and one fsync"""
+    if not mutations:
+        return
+    now = time.time()
+    data = b''.join(
+        (json.dumps({'ts': now, 'op': op, 'username': username, 'fields': fields},
+                    separators=(',', ':')) + '\n').encode('utf-8')
+        for op, username, fields in mutations
+    )
+    with _file_lock(JOURNAL_FILE):
+        with open(JOURNAL_FILE, 'ab') as journal:
+            journal.write(data)
+            journal.flush()
+            if JOURNAL_FSYNC:
+                os.fsync(journal.fileno())
+            size = journal.tell()
+    if size >= COMPACT_BYTES:
+        _compact_now.set()
+    start_compactor()
+
+
+def _read_journal() -> Tuple[List[dict], int]:
+    """Read complete entries and the byte offset just past the last one"""
+    if not os.path.exists(JOURNAL_FILE):
+        return [], 0
+    with open(JOURNAL_FILE, 'rb') as journal:
+        data = journal.read()
+    entries = []
+    offset = 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b'\n'):
+            break  # an append still in progress
+        offset += len(line)
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            print(f"Skipping unreadable journal entry: {e}")
+    return entries, offset
+
+
+def read_entries() -> List[dict]:
+    """Get every complete entry not yet compacted into the snapshot"""
+    with _file_lock(JOURNAL_FILE):
+        return _read_journal()[0]
+
+
+def apply_entry(config: dict, entry: dict):
+    """Apply one journal entry to a config dict; replaying an entry twice is harmless"""
+    fields = entry.get('fields') or {}
+    if entry['op'] == 'set-cookie':
+        config['cookie'] = dict(fields)
+        return
+    usernames = config.setdefault('credentials', {}).setdefault('usernames', {})
+    username = entry['username']
+    if entry['op'] == 'register':
+        usernames[username] = dict(fields)
+    elif username in usernames:
+        usernames[username].update(fields)
+
+
+def _load_snapshot() -> dict:
+    import yaml
+    from yaml.loader import SafeLoader
+
+    if not os.path.exists(SNAPSHOT_FILE):
+        return {'credentials': {'usernames': {}}}
+    with open(SNAPSHOT_FILE) as file:
+        return yaml.load(file, Loader=SafeLoader) or {}
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write data to a temporary file and rename it over path, so readers never see a partial file"""
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def compact() -> int:
+    """Fold journal entries into the config.yaml snapshot; returns the number applied"""
+    with _file_lock(SNAPSHOT_FILE):
+        # Appends only wait while the journal is read and trimmed, not during the dump
+        with _file_lock(JOURNAL_FILE):
+            entries, offset = _read_journal()
+        if not entries:
+            return 0
+
+        import yaml
+
+        config = _load_snapshot()
+        for entry in entries:
+            apply_entry(config, entry)
+        _write_atomic(SNAPSHOT_FILE, yaml.dump(config).encode('utf-8'))
+
+        with _file_lock(JOURNAL_FILE):
+            with open(JOURNAL_FILE, 'rb') as journal:
+                journal.seek(offset)
+                remainder = journal.read()
+            _write_atomic(JOURNAL_FILE, remainder)
+    return len(entries)
+
+
+def _compact_loop(interval: float):
+    while True:
+        _compact_now.wait(interval)
+        _compact_now.clear()
+        try:
+            compact()
+        except Exception as e:
+            print(f"Error compacting user journal: {e}")
+
+
+def start_compactor(interval: float = COMPACT_INTERVAL):
+    """Start the background compaction thread if it is not already running"""
+    global _compactor
+    with _compactor_lock:
+        if _compactor is None or not _compactor.is_alive():
+            _compactor = threading.Thread(
+                target=_compact_loop,
+                args=(interval,),
+                name="user-journal-compactor",
+                daemon=True
+            )
+            _compactor.start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the user journal and config.yaml snapshot")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('compact', help="Fold pending journal entries into config.yaml")
+    commands.add_parser('pending', help="Print the number of entries waiting for compaction")
+
+    args = parser.parse_args()
+    if args.command == 'compact':
+        print(f"Compacted {compact()} entries into {SNAPSHOT_FILE}")
+    elif args.command == 'pending':
+        print(len(read_entries()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from utils import user_journal
+
+USER_DB = "users.db"
+CONFIG_FILE = user_journal.SNAPSHOT_FILE
+
+# Columns callers may change with update_user
+USER_FIELDS = ('email', 'name', 'password', 'profile_pic')
+
+DEFAULT_COOKIE = {
+    'expiry_days': 30,
+    'key': 'stock_dashboard_auth_key',
+    'name': 'stock_dashboard_cookie'
+}
+
+# Usernames allowed on admin pages such as Metrics, comma separated
+ADMIN_USERS = {name.strip() for name in os.environ.get('ADMIN_USERS', 'admin').split(',') if name.strip()}
+
+# Seeded when there is neither a database nor a config.yaml to import
+DEFAULT_ADMIN = {
+    'username': 'admin',
+    'email': 'admin@stockdashboard.com',
+    'name': 'Administrator',
+    'password': '$2b$12$3HbBuSN0/y2pRWQtN7ivKeBQdqQ.vG5RHfZ7z0ShIwAeIT7ik7p2i'  # admin123
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    name TEXT NOT NULL,
+    password TEXT NOT NULL,
+    profile_pic TEXT,
+    created_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_email ON users (email);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()
+
+# Credentials read model, rebuilt only when the stored revision changes
+_credentials = None
+_credentials_revision = None
+_credentials_lock = threading.Lock()
+
+
+def get_connection() -> sqlite3.Connection:
+    """Get this thread's connection to the user database, creating the schema on first use"""
+    path = os.path.abspath(USER_DB)
+    connection = getattr(_local, 'connection', None)
+    if connection is None or getattr(_local, 'path', None) != path:
+        connection = sqlite3.connect(path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        # WAL lets page renders read while a registration is being written
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        _local.connection = connection
+        _local.path = path
+    with _init_lock:
+        if path not in _initialized:
+            connection.executescript(SCHEMA)
+            _initialize(connection)
+            _initialized.add(path)
+    return connection
+
+
+def _initialize(connection: sqlite3.Connection):
+    """Build a new store from the config.yaml snapshot plus its journal, or seed the default admin"""
+    if connection.execute("SELECT 1 FROM meta WHERE key = 'initialized'").fetchone():
+        return
+    if os.path.exists(CONFIG_FILE):
+        count = _import_config(connection, CONFIG_FILE)
+        print(f"Imported {count} users from {CONFIG_FILE} into {USER_DB}")
+    entries = user_journal.read_entries()
+    if entries:
+        _replay(connection, entries)
+    elif not os.path.exists(CONFIG_FILE):
+        with connection:
+            _insert_user(connection, DEFAULT_ADMIN)
+            _set_meta(connection, 'cookie', json.dumps(DEFAULT_COOKIE))
+        admin = dict(DEFAULT_ADMIN)
+        user_journal.record('register', admin.pop('username'), **admin)
+        user_journal.record('set-cookie', **DEFAULT_COOKIE)
+    with connection:
+        _set_meta(connection, 'initialized', str(time.time()))
+        _bump_revision(connection)
+
+
+def _replay(connection: sqlite3.Connection, entries):
+    """Apply journal entries not yet compacted into config.yaml"""
+    with connection:
+        for entry in entries:
+            fields = entry.get('fields') or {}
+            try:
+                if entry['op'] == 'set-cookie':
+                    _set_meta(connection, 'cookie', json.dumps(fields))
+                elif entry['op'] == 'register':
+                    connection.execute("DELETE FROM users WHERE username = ?", (entry['username'],))
+                    _insert_user(connection, dict(fields, username=entry['username']))
+                else:
+                    fields = {field: value for field, value in fields.items() if field in USER_FIELDS}
+                    assignments = ', '.join(f"{field} = ?" for field in fields)
+                    if assignments:
+                        connection.execute(
+                            f"UPDATE users SET {assignments} WHERE username = ?",
+                            (*fields.values(), entry['username'])
+                        )
+            except sqlite3.IntegrityError as e:
+                print(f"Skipping journal entry for '{entry.get('username')}': {e}")
+
+
+def _set_meta(connection: sqlite3.Connection, key: str, value: str):
+    connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def _bump_revision(connection: sqlite3.Connection):
+    # Tells every process's credentials cache that users changed
+    connection.execute(
+        "INSERT INTO meta (key, value) VALUES ('revision', '1') "
+        "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+    )
+
+
+def _insert_user(connection: sqlite3.Connection, user: dict, ignore_existing: bool = False):
+    verb = "INSERT OR IGNORE" if ignore_existing else "INSERT"
+    cursor = connection.execute(
+        f"{verb} INTO users (username, email, name, password, profile_pic, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            user['username'].lower(),
+            user['email'].lower(),
+            user['name'],
+            user['password'],
+            user.get('profile_pic'),
+            time.time(),
+        )
+    )
+    return cursor.rowcount
+
+
+def _import_config(connection: sqlite3.Connection, path: str) -> int:
+    import yaml
+    from yaml.loader import SafeLoader
+
+    with open(path) as file:
+        config = yaml.load(file, Loader=SafeLoader) or {}
+    users = config.get('credentials', {}).get('usernames', {}) or {}
+    imported = 0
+    with connection:
+        for username, data in users.items():
+            try:
+                imported += _insert_user(connection, dict(data, username=username), ignore_existing=True)
+            except sqlite3.IntegrityError as e:
+                print(f"Skipping user '{username}' from {path}: {e}")
+        _set_meta(connection, 'cookie', json.dumps(config.get('cookie') or DEFAULT_COOKIE))
+        _bump_revision(connection)
+    return imported
+
+
+def import_config(path: str = CONFIG_FILE) -> int:
+    """Import users from a streamlit-authenticator config file; existing usernames are kept"""
+    connection = get_connection()
+    existing = {row['username'] for row in connection.execute("SELECT username FROM users")}
+    count = _import_config(connection, path)
+    if os.path.abspath(path) != os.path.abspath(CONFIG_FILE):
+        # Journal the new users so the config.yaml snapshot picks them up
+        for row in connection.execute("SELECT username, email, name, password, profile_pic FROM users"):
+            if row['username'] not in existing:
+                user = {key: row[key] for key in row.keys() if key != 'username' and row[key] is not None}
+                user_journal.record('register', row['username'], **user)
+        user_journal.record('set-cookie', **get_cookie_config())
+    return count
+
+
+def get_user(username: str) -> Optional[dict]:
+    """Get a user's record by username"""
+    row = get_connection().execute(
+        "SELECT * FROM users WHERE username = ?", (username.lower(),)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def username_exists(username: str) -> bool:
+    """Check whether a username is taken"""
+    return get_connection().execute(
+        "SELECT 1 FROM users WHERE username = ?", (username.lower(),)
+    ).fetchone() is not None
+
+
+def email_exists(email: str) -> bool:
+    """Check whether an email address is already registered"""
+    return get_connection().execute(
+        "SELECT 1 FROM users WHERE email = ?", (email.lower(),)
+    ).fetchone() is not None
+
+
+def add_user(username: str, email: str, name: str, password_hash: str) -> bool:
+    """Add a user; returns False if the username or email is already taken"""
+    connection = get_connection()
+    try:
+        with connection:
+            _insert_user(connection, {
+                'username': username,
+                'email': email,
+                'name': name,
+                'password': password_hash,
+            })
+            _bump_revision(connection)
+    except sqlite3.IntegrityError:
+        return False
+    user_journal.record('register', username.lower(), email=email.lower(), name=name, password=password_hash)
+    return True
+
+
+def add_users(users) -> int:
+    """Add many users ({'username', 'email', 'name', 'password'} dicts) in one transaction.
+
+    Users whose username or email is taken are skipped; returns the number added.
+    """
+    connection = get_connection()
+    added = []
+    with connection:
+        for user in users:
+            try:
+                if _insert_user(connection, user, ignore_existing=True):
+                    added.append(user)
+            except sqlite3.IntegrityError:
+                pass  # email already registered
+        if added:
+            _bump_revision(connection)
+    user_journal.record_many([
+        ('register', user['username'].lower(),
+         {'email': user['email'].lower(), 'name': user['name'], 'password': user['password']})
+        for user in added
+    ])
+    return len(added)
+
+
+def update_user(username: str, **fields) -> bool:
+    """Update some of a user's fields (email, name, password, profile_pic) in place"""
+    unknown = set(fields) - set(USER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown user fields: {', '.join(sorted(unknown))}")
+    if not fields:
+        return False
+    if 'email' in fields:
+        fields['email'] = fields['email'].lower()
+    assignments = ', '.join(f"{field} = ?" for field in fields)
+    connection = get_connection()
+    with connection:
+        cursor = connection.execute(
+            f"UPDATE users SET {assignments} WHERE username = ?",
+            (*fields.values(), username.lower())
+        )
+        if cursor.rowcount:
+            _bump_revision(connection)
+    if not cursor.rowcount:
+        return False
+    user_journal.record(_journal_op(fields), username.lower(), **fields)
+    return True
+
+
+def _journal_op(fields: dict) -> str:
+    if set(fields) == {'password'}:
+        return 'change-password'
+    if set(fields) == {'profile_pic'}:
+        return 'set-profile-pic'
+    return 'update'
+
+
+def _revision(connection: sqlite3.Connection) -> Optional[str]:
+    row = connection.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+    return row['value'] if row else None
+
+
+def get_credentials() -> Dict[str, dict]:
+    """Get the credentials dict streamlit-authenticator expects: {'usernames': {username: {...}}}"""
+    global _credentials, _credentials_revision
+    connection = get_connection()
+    revision = _revision(connection)
+    with _credentials_lock:
+        if _credentials is None or revision != _credentials_revision:
+            usernames = {}
+            for row in connection.execute("SELECT username, email, name, password, profile_pic FROM users"):
+                user = {'email': row['email'], 'name': row['name'], 'password': row['password']}
+                if row['profile_pic']:
+                    user['profile_pic'] = row['profile_pic']
+                usernames[row['username']] = user
+            _credentials = usernames
+            _credentials_revision = revision
+        # The authenticator mutates what it is given, so hand out a copy
+        return {'usernames': {username: dict(user) for username, user in _credentials.items()}}
+
+
+def get_cookie_config() -> dict:
+    """Get the authentication cookie settings"""
+    row = get_connection().execute("SELECT value FROM meta WHERE key = 'cookie'").fetchone()
+    if row is None:
+        return dict(DEFAULT_COOKIE)
+    try:
+        return json.loads(row['value']) or dict(DEFAULT_COOKIE)
+    except json.JSONDecodeError:
+        # Stores created before cookies were kept as JSON hold YAML
+        import yaml
+        from yaml.loader import SafeLoader
+
+        return yaml.load(row['value'], Loader=SafeLoader) or dict(DEFAULT_COOKIE)
+
+
+def is_admin(username: Optional[str]) -> bool:
+    """Check whether a user may open admin pages"""
+    return bool(username) and username in ADMIN_USERS
+
+
+def count_users() -> int:
+    """Get the number of registered users"""
+    return get_connection().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the dashboard user store")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help="Import users from a config.yaml")
+    import_parser.add_argument('path', nargs='?', default=CONFIG_FILE)
+
+    commands.add_parser('count', help="Print the number of users")
+
+    args = parser.parse_args()
+    if args.command == 'import':
+        print(f"Imported {import_config(args.path)} users from {args.path}")
+    elif args.command == 'count':
+        print(count_users())
+
+
+if __name__ == "__main__":
+    main()